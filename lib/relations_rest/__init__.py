@@ -0,0 +1,13 @@
+"""
+Source module for REST backends
+"""
+
+from relations_rest.transport import Adapter, Pool, Retry, Breaker
+from relations_rest.codec import Codec, Compression
+from relations_rest.cache import Cache, DiskCache, Coalescer
+from relations_rest.instrument import Instrument, Metrics, streamed, instrumented
+from relations_rest.record import Lazy, Partial
+from relations_rest.batch import Scope, Batch
+from relations_rest.base import BaseSource
+from relations_rest.source import Source
+from relations_rest.asynchronous import AsyncSource
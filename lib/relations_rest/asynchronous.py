@@ -0,0 +1,201 @@
+"""
+Source module for REST backends with asyncio
+"""
+
+# pylint: disable=arguments-differ,invalid-overridden-method
+
+import relations
+
+from relations_rest.base import BaseSource
+
+class AsyncSource(BaseSource):
+    """
+    Source with a REST backend for asyncio, using httpx
+    """
+
+    def __init__(self, name, url, session=None, *, max_connections=100, max_keepalive=20, codec=None, compression=None, **kwargs):
+
+        super().__init__(name, url, codec=codec, compression=compression)
+
+        if session is not None:
+            self.session = self.accepting(session)
+        else:
+            import httpx # pylint: disable=import-outside-toplevel
+            options = {key: arg for key, arg in kwargs.items() if key not in ["name", "url"]}
+            options["headers"] = httpx.Headers(options.get("headers"))
+            options["headers"].setdefault("Accept-Encoding", self.compression.accept)
+            self.session = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive), **options
+            )
+
+    def encode(self, body):
+        """
+        Serializes a body ahead of sending, as httpx wants it
+        """
+
+        encoded = super().encode(body)
+        encoded["content"] = encoded.pop("data")
+
+        return encoded
+
+    async def close(self):
+        """
+        Closes the session and its pool
+        """
+
+        await self.session.aclose()
+
+    async def create(self, model):
+        """
+        Executes the create
+        """
+
+        models = model._each("create")
+
+        records = self.result(model, model.PLURAL, await self.session.request(
+            "POST", f"{self.url}/{model.ENDPOINT}", **self.encode({model.PLURAL: self.create_values(models)}))
+        )
+
+        for index, creating in enumerate(models):
+
+            self.create_id(model, creating, records[index])
+
+            if not model._bulk:
+
+                for parent_child in creating.CHILDREN:
+                    if creating._children.get(parent_child):
+                        await creating._children[parent_child].create()
+
+            creating._action = "update"
+            creating._record._action = "update"
+
+        return self.created(model)
+
+    async def count(self, model):
+        """
+        Executes the retrieve
+        """
+
+        return self.result(model, model.PLURAL, await self.session.request(
+            "GET", f"{self.url}/{model.ENDPOINT}", json=self.count_body(model))
+        )
+
+    async def retrieve(self, model, verify=True, fields=None, lazy=False, total=False):
+        """
+        Executes the retrieve, only the fields if sent, building many only as accessed if lazy,
+        and setting _total to the count of all that match if total
+        """
+
+        if fields is not None:
+            fields = self.project(model, fields)
+
+        body = self.retrieve_body(model, fields)
+
+        if total:
+            body["total"] = True
+            model._total = None
+
+        matches = self.result(model, model.PLURAL, await self.session.request(
+            "GET", f"{self.url}/{model.ENDPOINT}", json=body)
+        )
+
+        if total and model._total is None:
+            model._total = self.result(model, model.PLURAL, await self.session.request(
+                "GET", f"{self.url}/{model.ENDPOINT}", json={"filter": body["filter"], "count": True})
+            )
+
+        return self.retrieve_models(model, matches, verify, fields, lazy)
+
+    async def titles(self, model):
+        """
+        Creates the titles structure, retrieving only the titles fields
+        """
+
+        if model._action == "retrieve":
+            await self.retrieve(model, fields=self.titles_fields(model))
+
+        # relations.Titles would look up parent titles synchronously, so fill it in here
+
+        titles = relations.Titles.__new__(relations.Titles)
+
+        titles.id = model._id
+        titles.fields = model._titles
+
+        titles.ids = []
+        titles.titles = {}
+        titles.format = []
+        titles.parents = {}
+
+        for field in titles.fields:
+            relation = model._ancestor(field)
+            if relation is not None:
+                titles.parents[field] = await relation.Parent.many(**{f"{relation.parent_field}__in": model[field]}).titles()
+                titles.format.extend(titles.parents[field].format)
+            elif field in model._fields._names and model._fields._names[field].format is not None:
+                titles.format.extend(model._fields._names[field].format)
+            else:
+                titles.format.append(None)
+
+        for titling in model._each():
+            titles.add(titling)
+
+        return titles
+
+    async def update(self, model):
+        """
+        Executes the update
+        """
+
+        # If the overall model is retrieving and the record has values set
+
+        updated = 0
+
+        if model._action == "retrieve" and model._record._action == "update":
+
+            updated += self.result(model, "updated", await self.session.request(
+                "PATCH", f"{self.url}/{model.ENDPOINT}", **self.encode(self.mass_body(model)))
+            )
+
+        elif model._id:
+
+            for updating in model._each("update"):
+
+                updated += self.result(updating, "updated", await self.session.request(
+                    "PATCH", f"{self.url}/{model.ENDPOINT}/{updating[model._id]}", **self.encode(self.update_body(updating)))
+                )
+
+                for parent_child in updating.CHILDREN:
+                    if updating._children.get(parent_child):
+                        await (await updating._children[parent_child].create()).update()
+
+        else:
+
+            raise relations.ModelError(model, "nothing to update from")
+
+        return updated
+
+    async def delete(self, model):
+        """
+        Executes the delete
+        """
+
+        if model._action == "retrieve":
+            return self.result(model, "deleted", await self.session.request(
+                "DELETE", f"{self.url}/{model.ENDPOINT}", **self.encode(self.mass_delete_body(model)))
+            )
+
+        if not model._id:
+            raise relations.ModelError(model, "nothing to delete from")
+
+        deletings = model._each()
+
+        deleted = self.result(model, "deleted", await self.session.request(
+            "DELETE", f"{self.url}/{model.ENDPOINT}", **self.encode(self.delete_body(model, deletings)))
+        )
+
+        for deleting in deletings:
+            deleting._action = "create"
+
+        model._action = "create"
+
+        return deleted
@@ -0,0 +1,483 @@
+"""
+What REST sources share
+"""
+
+# pylint: disable=arguments-differ,too-many-public-methods
+
+import copy
+import time
+import collections.abc
+
+import relations
+
+from relations_rest.codec import Codec, Compression
+from relations_rest.record import Lazy, Partial
+
+class BaseSource(relations.Source):
+    """
+    What Source and AsyncSource share, building what's sent and reading what's received, without sending anything
+    """
+
+    url = None
+    codec = None
+    compression = None
+    instrument = None
+
+    def __init__(self, name, url, *, codec=None, compression=None): # pylint: disable=unused-argument
+
+        self.url = url
+        self.codec = codec if codec is not None else Codec()
+        self.compression = compression if compression is not None else Compression()
+
+    def accepting(self, session):
+        """
+        Has a session passed in accept the encodings this does, unless it already says what it accepts
+        """
+
+        if isinstance(getattr(session, "headers", None), collections.abc.MutableMapping):
+            session.headers.setdefault("Accept-Encoding", self.compression.accept)
+
+        return session
+
+    def decode(self, model, response):
+        """
+        Checks a response and returns its body, decoded just the once
+        """
+
+        start = time.perf_counter() if self.instrument is not None else None
+
+        # An error's an error whatever the body, as a proxy's error page might not be JSON
+
+        try:
+            body = self.codec.loads(response.content)
+        except ValueError as exception:
+            if response.status_code >= 400:
+                raise relations.ModelError(model, f"API Error {response.status_code}") from exception
+            raise
+
+        if self.instrument is not None:
+            self.emit(model, "decode", "JSON", start, received=len(response.content))
+
+        return self.check(model, response.status_code, body)
+
+    @staticmethod
+    def check(model, status, body):
+        """
+        Raises if the status is an error, else returns the body
+        """
+
+        if status >= 400:
+            raise relations.ModelError(model, body.get("message", "API Error") if isinstance(body, dict) else "API Error")
+
+        return body
+
+    def encode(self, body):
+        """
+        Serializes a body ahead of sending, compressing if large enough
+        """
+
+        headers = {"Content-Type": "application/json"}
+        data = self.compression.compress(self.codec.dumps(body), headers)
+
+        return {"data": data, "headers": headers}
+
+    @staticmethod
+    def unpack(model, key, body):
+        """
+        Returns the result from a body
+        """
+
+        if "overflow" in body:
+            model.overflow = model.overflow or body["overflow"]
+
+        if "total" in body:
+            model._total = body["total"]
+
+        return body[key]
+
+    def result(self, model, key, response):
+        """
+        Checks a response and returns the result
+        """
+
+        return self.unpack(model, key, self.decode(model, response))
+
+    def emit(self, model, kind, verb, start, **details):
+        """
+        Emits an event to the instrument
+        """
+
+        self.instrument.emit({
+            "kind": kind,
+            "endpoint": model.ENDPOINT,
+            "verb": verb,
+            "seconds": time.perf_counter() - start,
+            **details
+        })
+
+    @staticmethod
+    def rows(result):
+        """
+        How many rows an operation did, if known
+        """
+
+        if isinstance(result, bool) or result is None:
+            return None
+
+        if isinstance(result, int):
+            return result
+
+        if isinstance(result, relations.Model):
+            return len(result._models) if result._models is not None else int(result._record is not None)
+
+        if isinstance(result, relations.Titles):
+            return len(result)
+
+        return None
+
+    def init(self, model):
+        """
+        Init the model
+        """
+
+        self.record_init(model._fields)
+
+        self.ensure_attribute(model, "SINGULAR")
+        self.ensure_attribute(model, "PLURAL")
+        self.ensure_attribute(model, "ENDPOINT")
+        self.ensure_attribute(model, "_total")
+        self.ensure_attribute(model, "_cursor")
+
+        if model.SINGULAR is None:
+            model.SINGULAR = model.NAME
+
+        if model.PLURAL is None:
+            model.PLURAL = f"{model.SINGULAR}s"
+
+        if model.ENDPOINT is None:
+            model.ENDPOINT = model.SINGULAR
+
+        if model._id is not None and model._fields._names[model._id].auto is None:
+            model._fields._names[model._id].auto = True
+
+    def create_field(self, field, values):
+        """
+        Updates values with the field's that changed
+        """
+
+        if not field.auto:
+            values[field.name] = field.export()
+
+    def create_values(self, models):
+        """
+        Builds the values to create
+        """
+
+        values = []
+
+        for creating in models:
+            record = {}
+            self.create_record(creating._record, record)
+            values.append(record)
+
+        return values
+
+    @staticmethod
+    def create_id(model, creating, record):
+        """
+        Sets the id created if auto
+        """
+
+        if model._id is None or not model._fields._names[model._id].auto:
+            return
+
+        id = record[model._fields._names[model._id].store]
+
+        # Set directly rather than propagate, which would look up (count) every child not already there
+
+        creating._record[model._id] = id
+
+        if model._id in creating._related:
+            creating._related[model._id] = id
+
+        for parent_child, relation in creating.CHILDREN.items():
+            if relation.parent_field == model._id and creating._children.get(parent_child):
+                creating._children[parent_child][relation.child_field] = id
+
+    @staticmethod
+    def create_ids(model, creatings, records):
+        """
+        Sets the ids created, and that they're now to update
+        """
+
+        for creating, record in zip(creatings, records):
+
+            BaseSource.create_id(model, creating, record)
+
+            creating._action = "update"
+            creating._record._action = "update"
+
+    @staticmethod
+    def created(model):
+        """
+        Marks the model created, bulk letting go of what it was holding
+        """
+
+        if model._bulk:
+            model._models = []
+        else:
+            model._action = "update"
+
+        return model
+
+    def retrieve_field(self, field, criteria):
+        """
+        Adds critera to the filter
+        """
+
+        for operator, value in (field.criteria or {}).items():
+            criteria[f"{field.name}__{operator}"] = sorted(value) if isinstance(value, set) else value
+
+    def filter_body(self, model):
+        """
+        Builds the filter body shared by count and retrieve
+        """
+
+        model._collate()
+
+        body = {"filter": {}}
+        self.retrieve_record(model._record, body["filter"])
+
+        if model._like:
+            body["filter"]["like"] = model._like
+
+        return body
+
+    def count_body(self, model):
+        """
+        Builds the body to count with
+        """
+
+        body = self.filter_body(model)
+
+        body["count"] = True
+
+        return body
+
+    @staticmethod
+    def project(model, fields):
+        """
+        Fields to retrieve, always with the id and what injected fields are stored in
+        """
+
+        names = model._fields._names
+
+        projected = [] if model._id is None else [model._id]
+
+        for field in fields:
+
+            name = field.split("__")[0]
+
+            if name not in names:
+                raise relations.ModelError(model, f"unknown field '{name}'")
+
+            for name in [name, names[name].inject.split("__")[0]] if names[name].inject else [name]:
+                if name not in projected:
+                    projected.append(name)
+
+        return projected
+
+    @staticmethod
+    def partial(model, match, fields):
+        """
+        Builds a record with only some fields
+        """
+
+        record = copy.deepcopy(model._fields)
+
+        object.__setattr__(record, "__class__", Partial)
+
+        record._action = "update"
+        record._loaded = set(fields)
+
+        record.read(match)
+
+        for field, value in model._related.items():
+            record[field] = value
+
+        return record
+
+    def retrieve_body(self, model, fields=None):
+        """
+        Builds the body to retrieve with, projected to fields if sent
+        """
+
+        body = self.filter_body(model)
+
+        if fields is not None:
+            names = model._fields._names
+            body["fields"] = [names[name].store for name in fields if not names[name].inject]
+
+        if model._sort:
+            body["sort"] = model._sort
+
+        if model._limit is not None:
+            body["limit"] = {"per_page": model._limit}
+            if model._offset:
+                body["limit"]["start"] = model._offset
+
+        return body
+
+    def retrieve_models(self, model, matches, verify=True, fields=None, lazy=False):
+        """
+        Builds the model from what matched, partial if projected, and for many
+        only as each is accessed if lazy
+        """
+
+        if model._mode == "one" and len(matches) > 1:
+            raise relations.ModelError(model, "more than one retrieved")
+
+        if model._mode == "one" and model._role != "child":
+
+            if len(matches) < 1:
+
+                if verify:
+                    raise relations.ModelError(model, "none retrieved")
+                return None
+
+            if fields is None:
+                model._record = model._build("update", _read=matches[0])
+                self.identify(model, matches[0])
+            else:
+                model._record = self.partial(model, matches[0], fields)
+
+        elif lazy:
+
+            model._models = Lazy(lambda match: self.build(model, match, fields), matches)
+            model._record = None
+
+        else:
+
+            start = time.perf_counter() if self.instrument is not None else None
+
+            model._models = []
+
+            for match in matches:
+                model._models.append(self.build(model, match, fields))
+
+            model._record = None
+
+            if self.instrument is not None:
+                self.emit(model, "build", "MODELS", start, rows=len(matches))
+
+        model._action = "update"
+
+        return model
+
+    def identify(self, model, match): # pylint: disable=unused-argument
+        """
+        Maps a model retrieved one, nothing to map it in here
+        """
+
+    def build(self, model, match, fields=None):
+        """
+        Builds a model from a match, partial if projected
+        """
+
+        if fields is None:
+            return model.__class__(_read=match)
+
+        built = model.__class__(_action="update")
+
+        built._mode = "one"
+        built._record = self.partial(built, match, fields)
+
+        return built
+
+    @staticmethod
+    def titles_fields(model):
+        """
+        Fields titles need, the titles and indexes, project adds the id
+        """
+
+        return model._titles + [field for index in (model._index or {}).values() for field in index]
+
+    def update_field(self, field, values):
+        """
+        Updates values with the field's that changed
+        """
+
+        if not field.auto and field.delta():
+            values[field.name] = field.original = field.export()
+
+    def update_record(self, record, values):
+        """
+        Updates values with the record's fields that changed, only those retrieved if partial
+        """
+
+        for field in record._order:
+            if not isinstance(record, Partial) or field.name in record._loaded:
+                self.update_field(field, values)
+
+    def field_mass(self, field, values):
+        """
+        Mass values with the field's that changed
+        """
+
+        if not field.auto and field.changed:
+            values[field.name] = field.export()
+
+    def mass_body(self, model):
+        """
+        Builds the body to mass update with
+        """
+
+        criteria = {}
+        self.retrieve_record(model._record, criteria)
+
+        values = {}
+        self.record_mass(model._record, values)
+
+        return {"filter": criteria, model.PLURAL: values}
+
+    def update_body(self, updating):
+        """
+        Builds the body to update a single model with
+        """
+
+        values = {}
+        self.update_record(updating._record, values)
+
+        return {updating.SINGULAR: values}
+
+    def bulk_body(self, model, updatings):
+        """
+        Builds the body to update many models by id at once
+        """
+
+        values = []
+
+        for updating in updatings:
+            record = {model._id: updating[model._id]}
+            self.update_record(updating._record, record)
+            values.append(record)
+
+        return {model.PLURAL: values}
+
+    def mass_delete_body(self, model):
+        """
+        Builds the body to mass delete with
+        """
+
+        criteria = {}
+        self.retrieve_record(model._record, criteria)
+
+        return {"filter": criteria}
+
+    @staticmethod
+    def delete_body(model, deletings):
+        """
+        Builds the body to delete models by id
+        """
+
+        return {"filter": {f"{model._id}__in": [deleting[model._id] for deleting in deletings]}}
@@ -0,0 +1,104 @@
+"""
+Identity scopes and batches for REST sources
+"""
+
+import concurrent.futures
+
+class Scope:
+    """
+    Identity map of the models retrieved within it, by endpoint and id
+    """
+
+    def __init__(self):
+
+        self.models = {}
+
+    def get(self, endpoint, id):
+        """
+        Gets the model mapped, None if not
+        """
+
+        return self.models.get((endpoint, id))
+
+    def setdefault(self, endpoint, id, model):
+        """
+        Maps a model unless one's already mapped, returning whichever is
+        """
+
+        return self.models.setdefault((endpoint, id), model)
+
+    def evict(self, endpoint, id=None):
+        """
+        Removes a model, or all for an endpoint if no id
+        """
+
+        if id is not None:
+            self.models.pop((endpoint, id), None)
+            return
+
+        for key in [key for key in self.models if key[0] == endpoint]:
+            del self.models[key]
+
+class Batch:
+    """
+    Operations queued to send together to a batch endpoint, each with the calls it makes, what to
+    do with their results, what to undo if it fails, and a future for what it returns
+
+    Models queued to create are kept track of, so creating again before sending doesn't queue them twice
+    """
+
+    NAME = "batch"
+
+    def __init__(self, endpoint):
+
+        self.ENDPOINT = endpoint # pylint: disable=invalid-name
+        self.operations = []
+        self.creating = set()
+
+    def queue(self, calls, finish, undo=None):
+        """
+        Queues calls, (model, key, method, path, body), with finish to call with their results,
+        and undo to call if they fail
+        """
+
+        future = concurrent.futures.Future()
+
+        self.operations.append((calls, finish, undo, future))
+
+        return future
+
+    @staticmethod
+    def fail_operation(undo, future, exception):
+        """
+        Fails an operation, undoing whatever was done queuing it
+        """
+
+        if undo is not None:
+            undo()
+
+        future.set_exception(exception)
+
+    def fail(self, exception):
+        """
+        Fails every operation not already finished
+        """
+
+        for _, _, undo, future in self.operations:
+            if not future.done():
+                self.fail_operation(undo, future, exception)
+
+    def calls(self):
+        """
+        Every call queued, in order
+        """
+
+        return [call for calls, _, _, _ in self.operations for call in calls]
+
+    def body(self):
+        """
+        Builds the body to send with
+        """
+
+        return {"requests": [
+            {"method": method.upper(), "path": path, "body": body} for _, _, method, path, body in self.calls()
+        ]}
@@ -0,0 +1,433 @@
+"""
+Caching and coalescing retrieves and counts for REST sources
+"""
+
+import os
+import copy
+import json
+import time
+import sqlite3
+import logging
+import threading
+import collections
+import concurrent.futures
+
+import relations
+
+from relations_rest.codec import Codec
+
+class Cache:
+    """
+    In process cache of retrieves and counts, keyed by endpoint (with the url) and body, expiring
+    after ttl seconds and evicting the least recently used past size
+
+    Each endpoint has a generation, moved on by invalidating, so what was fetched before
+    an invalidation, but set after, isn't kept
+    """
+
+    size = None
+    ttl = None
+
+    hits = None
+    misses = None
+    evictions = None
+
+    def __init__(self, size=1000, ttl=60):
+
+        self.size = size
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.entries = collections.OrderedDict()
+        self.generations = collections.Counter()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint, body):
+        """
+        Canonical key for an endpoint and body
+        """
+
+        return (endpoint, json.dumps(body, sort_keys=True, separators=(",", ":")))
+
+    def generation(self, endpoint):
+        """
+        The endpoint's generation, to set with what's fetched from now on
+        """
+
+        with self.lock:
+            return self.generations[endpoint]
+
+    def get(self, endpoint, body):
+        """
+        Gets a copy of what's cached, None if not there or expired
+        """
+
+        key = self.key(endpoint, body)
+
+        with self.lock:
+
+            entry = self.entries.get(key)
+
+            if entry is not None and entry[0] < time.monotonic():
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+
+        return copy.deepcopy(entry[1])
+
+    def set(self, endpoint, body, value, generation=None):
+        """
+        Caches a copy of a value, unless the endpoint's been invalidated since generation
+        """
+
+        key = self.key(endpoint, body)
+        value = copy.deepcopy(value)
+
+        with self.lock:
+
+            if generation is not None and generation != self.generations[endpoint]:
+                return
+
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, endpoint):
+        """
+        Removes everything cached for an endpoint
+        """
+
+        with self.lock:
+
+            self.generations[endpoint] += 1
+
+            for key in [key for key in self.entries if key[0] == endpoint]:
+                del self.entries[key]
+
+    def stats(self):
+        """
+        Counters for tuning
+        """
+
+        with self.lock:
+            return {
+                "size": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions
+            }
+
+class DiskCache(Cache):
+    """
+    Cache shared by every process on a host, in sqlite under directory, expiring
+    after ttl seconds and evicting the least recently set past size, counting
+    hits, misses, evictions, and errors for this process
+
+    Values are stored as JSON through codec, never pickled, and the directory has to
+    be only writable by its owner, this user, so no one else can feed workers values
+
+    Generations are kept in sqlite too, so an invalidation by any process keeps
+    what was fetched before it from being set after
+
+    Anything going wrong with sqlite is logged and counted, a get missing and
+    a set or invalidate skipped, so a cache that's down only slows things down
+    """
+
+    path = None
+    timeout = None
+    codec = None
+    errors = None
+
+    def __init__(self, directory, name="relations-rest", size=10000, ttl=60, timeout=5, codec=None):
+
+        super().__init__(size=size, ttl=ttl)
+
+        self.path = os.path.join(directory, f"{name}.sqlite")
+        self.timeout = timeout
+        self.codec = codec if codec is not None else Codec()
+        self.errors = 0
+        self.local = threading.local()
+
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+
+        status = os.stat(directory)
+
+        if status.st_mode & 0o022 or (hasattr(os, "getuid") and status.st_uid != os.getuid()):
+            raise PermissionError(f"{directory} has to be owned by and only writable by this user")
+
+        self.sqlite("create", lambda connection: (
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "endpoint TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, value BLOB NOT NULL, "
+                "PRIMARY KEY (endpoint, key))"
+            ),
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)"),
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS generations (endpoint TEXT NOT NULL PRIMARY KEY, generation INTEGER NOT NULL)"
+            )
+        ))
+
+    @property
+    def connection(self):
+        """
+        Connection for this thread in this process, as neither can be shared
+        """
+
+        if getattr(self.local, "pid", None) != os.getpid():
+
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+            self.local.connection = connection
+            self.local.pid = os.getpid()
+
+        return self.local.connection
+
+    def sqlite(self, action, call):
+        """
+        Calls with the connection in a transaction, returning what it does, or None if anything went wrong
+        """
+
+        try:
+            with self.connection as connection:
+                return call(connection)
+        except sqlite3.Error as exception:
+            with self.lock:
+                self.errors += 1
+            logging.getLogger(__name__).warning("disk cache %s %s failed: %s", self.path, action, exception)
+            return None
+
+    @staticmethod
+    def export_titles(titles):
+        """
+        JSON form of titles, ids kept as pairs as they might not be strings
+        """
+
+        return {
+            "id": titles.id,
+            "fields": titles.fields,
+            "ids": titles.ids,
+            "titles": [[id, titles.titles[id]] for id in titles.ids],
+            "format": titles.format,
+            "parents": {field: DiskCache.export_titles(parent) for field, parent in titles.parents.items()}
+        }
+
+    @staticmethod
+    def read_titles(exported):
+        """
+        Titles from their JSON form
+        """
+
+        titles = relations.Titles.__new__(relations.Titles)
+
+        titles.id = exported["id"]
+        titles.fields = exported["fields"]
+        titles.ids = exported["ids"]
+        titles.titles = dict(exported["titles"])
+        titles.format = exported["format"]
+        titles.parents = {field: DiskCache.read_titles(parent) for field, parent in exported["parents"].items()}
+
+        return titles
+
+    def dumps(self, value):
+        """
+        Encodes a body, or titles, to bytes
+        """
+
+        if isinstance(value, relations.Titles):
+            return self.codec.dumps({"titles": self.export_titles(value)})
+
+        return self.codec.dumps({"body": value})
+
+    def loads(self, content):
+        """
+        Decodes a body, or titles, from bytes
+        """
+
+        value = self.codec.loads(content)
+
+        if "titles" in value:
+            return self.read_titles(value["titles"])
+
+        return value["body"]
+
+    @staticmethod
+    def generated(connection, endpoint):
+        """
+        The endpoint's generation, within a transaction
+        """
+
+        row = connection.execute("SELECT generation FROM generations WHERE endpoint=?", (endpoint,)).fetchone()
+
+        return row[0] if row is not None else 0
+
+    def generation(self, endpoint):
+        """
+        The endpoint's generation, to set with what's fetched from now on, -1 if anything went
+        wrong, which no set will match
+        """
+
+        generation = self.sqlite("generation", lambda connection: self.generated(connection, endpoint))
+
+        return -1 if generation is None else generation
+
+    def get(self, endpoint, body):
+        """
+        Gets a copy of what's cached, None if not there, expired, or anything went wrong
+        """
+
+        key = self.key(endpoint, body)
+
+        row = self.sqlite("get", lambda connection: connection.execute(
+            "SELECT value FROM entries WHERE endpoint=? AND key=? AND expires>=?", (*key, time.time())
+        ).fetchone())
+
+        value = None
+
+        if row is not None:
+            try:
+                value = self.loads(row[0])
+            except (ValueError, KeyError, TypeError) as exception:
+                logging.getLogger(__name__).warning("disk cache %s get failed: %s", self.path, exception)
+                with self.lock:
+                    self.errors += 1
+
+        with self.lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return value
+
+    def set(self, endpoint, body, value, generation=None):
+        """
+        Caches a copy of a value, unless the endpoint's been invalidated since generation
+        """
+
+        key = self.key(endpoint, body)
+        content = self.dumps(value)
+
+        def store(connection):
+
+            if generation is not None and generation != self.generated(connection, endpoint):
+                return 0
+
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (endpoint, key, expires, value) VALUES (?, ?, ?, ?)",
+                (*key, time.time() + self.ttl, content)
+            )
+
+            connection.execute("DELETE FROM entries WHERE expires<?", (time.time(),))
+
+            return connection.execute(
+                "DELETE FROM entries WHERE rowid IN (SELECT rowid FROM entries ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                (self.size,)
+            ).rowcount
+
+        evicted = self.sqlite("set", store)
+
+        with self.lock:
+            self.evictions += evicted or 0
+
+    def invalidate(self, endpoint):
+        """
+        Removes everything cached for an endpoint, for every process
+        """
+
+        self.sqlite("invalidate", lambda connection: (
+            connection.execute("INSERT OR IGNORE INTO generations (endpoint, generation) VALUES (?, 0)", (endpoint,)),
+            connection.execute("UPDATE generations SET generation=generation+1 WHERE endpoint=?", (endpoint,)),
+            connection.execute("DELETE FROM entries WHERE endpoint=?", (endpoint,))
+        ))
+
+    def stats(self):
+        """
+        Counters for tuning
+        """
+
+        size = self.sqlite("stats", lambda connection: connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0])
+
+        with self.lock:
+            return {
+                "size": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "errors": self.errors
+            }
+
+class Coalescer:
+    """
+    Coalesces identical concurrent requests, keyed by endpoint and body, the first
+    caller sending and the rest waiting for and getting copies of what it got
+    """
+
+    def __init__(self):
+
+        self.flights = {}
+        self.lock = threading.Lock()
+
+        self.sent = 0
+        self.coalesced = 0
+
+    def do(self, endpoint, body, call):
+        """
+        Calls unless an identical call's in flight, then waits for its result
+        """
+
+        key = Cache.key(endpoint, body)
+
+        with self.lock:
+
+            flight = self.flights.get(key)
+            leader = flight is None
+
+            if leader:
+                flight = self.flights[key] = {"future": concurrent.futures.Future(), "waiting": 0}
+                self.sent += 1
+            else:
+                flight["waiting"] += 1
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(flight["future"].result())
+
+        try:
+            result = call()
+        except Exception as exception:
+            with self.lock:
+                del self.flights[key]
+            flight["future"].set_exception(exception)
+            raise
+
+        with self.lock:
+            del self.flights[key]
+
+        flight["future"].set_result(result)
+
+        # Copy if shared so no one's changes show up in anyone else's
+
+        return copy.deepcopy(result) if flight["waiting"] else result
+
+    def stats(self):
+        """
+        Counters for tuning
+        """
+
+        with self.lock:
+            return {"flights": len(self.flights), "sent": self.sent, "coalesced": self.coalesced}
@@ -0,0 +1,77 @@
+"""
+Encoding, decoding and compressing bodies for REST sources
+"""
+
+import gzip
+import json
+import zlib
+
+try:
+    import orjson
+except ImportError: # pragma: no cover
+    orjson = None
+
+class Codec:
+    """
+    Encodes to and decodes from JSON bytes, with orjson if installed, else json,
+    subclass and override dumps and loads for others
+    """
+
+    fast = None
+
+    def __init__(self, fast=None):
+
+        self.fast = orjson is not None if fast is None else fast
+
+    def dumps(self, value):
+        """
+        Encodes a value to bytes
+        """
+
+        if self.fast:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS) # pylint: disable=no-member
+
+        return json.dumps(value).encode()
+
+    def loads(self, content):
+        """
+        Decodes bytes to a value
+        """
+
+        if self.fast:
+            return orjson.loads(content) # pylint: disable=no-member
+
+        return json.loads(content)
+
+class Compression: # pylint: disable=too-few-public-methods
+    """
+    Compresses bodies of threshold bytes or more with encoding, gzip or deflate,
+    and accepts responses compressed as accept
+    """
+
+    ENCODINGS = ("gzip", "deflate")
+
+    threshold = None
+    encoding = None
+    accept = None
+
+    def __init__(self, threshold=None, encoding="gzip", accept="gzip, deflate"):
+
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"encoding has to be one of {', '.join(self.ENCODINGS)}, not {encoding}")
+
+        self.threshold = threshold
+        self.encoding = encoding
+        self.accept = accept
+
+    def compress(self, data, headers):
+        """
+        Compresses data if threshold bytes or more, saying so in headers
+        """
+
+        if self.threshold is None or len(data) < self.threshold:
+            return data
+
+        headers["Content-Encoding"] = self.encoding
+
+        return gzip.compress(data, compresslevel=6) if self.encoding == "gzip" else zlib.compress(data)
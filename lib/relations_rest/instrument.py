@@ -0,0 +1,147 @@
+"""
+Instrumenting REST sources
+"""
+
+import copy
+import time
+import inspect
+import logging
+import functools
+import threading
+import collections
+
+class Instrument: # pylint: disable=too-few-public-methods
+    """
+    Receives events about requests and what's done with them, override emit to send them somewhere
+
+    Events are dicts with kind (request, decode, build, or operation), endpoint, verb, and seconds,
+    along with whatever else is known for the kind, like status and bytes for requests, rows for operations
+    """
+
+    def emit(self, event):
+        """
+        Handles an event
+        """
+
+class Metrics(Instrument):
+    """
+    Aggregates events into latency histograms by kind, endpoint, and verb, logging
+    and keeping the last requests that took slow seconds or more
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    slow = None
+    buckets = None
+
+    def __init__(self, slow=1, buckets=None, keep=100):
+
+        self.slow = slow
+        self.buckets = tuple(buckets) if buckets is not None else self.BUCKETS
+
+        self.histograms = {}
+        self.slowest = collections.deque(maxlen=keep)
+        self.logger = logging.getLogger(__name__)
+        self.lock = threading.Lock()
+
+    def emit(self, event):
+        """
+        Adds an event to its histogram, and the slow log if a slow request
+        """
+
+        key = (event["kind"], event["endpoint"], event["verb"])
+
+        with self.lock:
+
+            if key not in self.histograms:
+                self.histograms[key] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * (len(self.buckets) + 1)}
+
+            histogram = self.histograms[key]
+            histogram["count"] += 1
+            histogram["sum"] += event["seconds"]
+            histogram["max"] = max(histogram["max"], event["seconds"])
+
+            for index, bucket in enumerate(self.buckets):
+                if event["seconds"] <= bucket:
+                    histogram["buckets"][index] += 1
+                    break
+            else:
+                histogram["buckets"][-1] += 1
+
+            slow = event["kind"] == "request" and self.slow is not None and event["seconds"] >= self.slow
+
+            if slow:
+                self.slowest.append(event)
+
+        if slow:
+            self.logger.warning("slow request %s %s %.3fs status %s", event["verb"], event["path"], event["seconds"], event.get("status"))
+
+    def histogram(self, kind, endpoint, verb):
+        """
+        Gets a copy of a histogram, None if nothing's been emitted for it
+        """
+
+        with self.lock:
+            return copy.deepcopy(self.histograms.get((kind, endpoint, verb)))
+
+    def stats(self):
+        """
+        All histograms, keyed by kind, endpoint, and verb, with their bucket bounds
+        """
+
+        histograms = {}
+
+        with self.lock:
+
+            for (kind, endpoint, verb), histogram in self.histograms.items():
+                histograms.setdefault(kind, {}).setdefault(endpoint, {})[verb] = copy.deepcopy(histogram)
+
+            return {"buckets": list(self.buckets), "histograms": histograms, "slow": list(self.slowest)}
+
+def streamed(source, model, verb, start, stream):
+    """
+    Yields what's streamed, emitting the operation event once it's done, or stopped
+    """
+
+    rows = 0
+    error = None
+
+    try:
+        for each in stream:
+            rows += 1
+            yield each
+    except Exception as exception:
+        error = str(exception)
+        raise
+    finally:
+        source.emit(model, "operation", verb, start, rows=rows, error=error)
+
+def instrumented(method):
+    """
+    Emits an operation event for a Source method if instrumented
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, model, *args, **kwargs):
+
+        if self.instrument is None:
+            return method(self, model, *args, **kwargs)
+
+        start = time.perf_counter()
+
+        try:
+            result = method(self, model, *args, **kwargs)
+        except Exception as exception:
+            self.emit(model, "operation", method.__name__, start, rows=None, error=str(exception))
+            raise
+
+        # A stream isn't done until it's gone through, so that's when it's emitted
+
+        if inspect.isgenerator(result):
+            return streamed(self, model, method.__name__, start, result)
+
+        self.emit(model, "operation", method.__name__, start, rows=self.rows(result), error=None)
+
+        return result
+
+    return wrapper
@@ -0,0 +1,137 @@
+"""
+Records built lazily or partially for REST sources
+"""
+
+import collections.abc
+
+import relations
+
+class Lazy(collections.abc.MutableSequence):
+    """
+    Models retrieved, kept as what matched and only built when accessed
+    """
+
+    __slots__ = ("build", "matches", "models")
+
+    def __init__(self, build, matches):
+
+        self.build = build
+        self.matches = matches
+        self.models = [None] * len(matches)
+
+    def model(self, index):
+        """
+        Gets a model, building it if not already, and letting go of its match
+        """
+
+        if self.models[index] is None:
+            self.models[index] = self.build(self.matches[index])
+            self.matches[index] = None
+
+        return self.models[index]
+
+    def __len__(self):
+
+        return len(self.models)
+
+    def __getitem__(self, index):
+
+        if isinstance(index, slice):
+            return [self.model(each) for each in range(len(self.models))[index]]
+
+        return self.model(index)
+
+    def __setitem__(self, index, value):
+
+        if isinstance(index, slice):
+            raise TypeError("slice assignment not supported")
+
+        self.models[index] = value
+        self.matches[index] = None
+
+    def __delitem__(self, index):
+
+        del self.models[index]
+        del self.matches[index]
+
+    def insert(self, index, value):
+
+        self.models.insert(index, value)
+        self.matches.insert(index, None)
+
+    def built(self):
+        """
+        How many models have been built
+        """
+
+        return sum(model is not None for model in self.models)
+
+class Partial(relations.Record):
+    """
+    Record retrieved with only some fields, failing loudly if others are read
+    """
+
+    _loaded = None
+
+    def check(self, key):
+        """
+        Makes sure a field was retrieved, else raises
+        """
+
+        if isinstance(key, int):
+            name = self._order[key].name if key < len(self._order) else None
+        else:
+            name = key.split("__")[0]
+
+        if name in self._names and name not in self._loaded: # pylint: disable=unsupported-membership-test
+            raise relations.RecordError(self, f"field '{name}' not retrieved")
+
+        return name
+
+    def __setattr__(self, name, value):
+
+        super().__setattr__(name, value)
+
+        if name[0] != '_' and name.split("__")[0] in self._names:
+            self._loaded.add(name.split("__")[0])
+
+    def __getattr__(self, name):
+
+        self.check(name)
+
+        return super().__getattr__(name)
+
+    def __setitem__(self, key, value):
+
+        super().__setitem__(key, value)
+
+        name = self._order[key].name if isinstance(key, int) else key.split("__")[0]
+
+        if name in self._names:
+            self._loaded.add(name)
+
+    def __getitem__(self, key):
+
+        self.check(key)
+
+        return super().__getitem__(key)
+
+    def export(self):
+        """
+        Exports only the retrieved values by name
+        """
+
+        return {field.name: field.export() for field in self._order if field.name in self._loaded} # pylint: disable=unsupported-membership-test
+
+    def read(self, values):
+        """
+        Loads only the retrieved values from storage
+        """
+
+        for field in self._order:
+            if field.name not in self._loaded: # pylint: disable=unsupported-membership-test
+                continue
+            if field.inject:
+                field.read(values[self._names[field.inject.split('__')[0]].store])
+            else:
+                field.read(values)
@@ -0,0 +1,1199 @@
+"""
+Source module for REST backends
+"""
+
+# pylint: disable=arguments-differ,too-many-public-methods
+
+import json
+import time
+import base64
+import contextlib
+import threading
+import concurrent.futures
+
+import requests
+import requests.structures
+import relations
+
+from relations_rest.base import BaseSource
+from relations_rest.batch import Scope, Batch
+from relations_rest.transport import Pool
+from relations_rest.instrument import instrumented
+
+class Source(BaseSource): # pylint: disable=too-many-instance-attributes
+    """
+    Source with a REST backend
+    """
+
+    workers = None
+    cache = None
+    conditional = None
+    chunk = None
+    bulk = None
+
+    pool = None
+    options = None
+
+    retry = None
+    breaker = None
+    coalesce = None
+    titles_cache = None
+
+    batch_endpoint = None
+
+    _session = None
+    _executor = None
+
+    local = None
+
+    def __init__(self, name, url, session=None, *, workers=4, cache=None, conditional=None, chunk=None, bulk=False, # pylint: disable=too-many-arguments,too-many-locals
+                 pool=None, retry=None, breaker=None, codec=None, compression=None, coalesce=None, instrument=None,
+                 titles_cache=None, batch_endpoint="batch", **kwargs):
+
+        super().__init__(name, url, codec=codec, compression=compression)
+
+        self.workers = workers
+        self.cache = cache
+        self.conditional = conditional
+        self.chunk = chunk
+        self.bulk = bulk
+
+        self.pool = pool if pool is not None else Pool()
+        self.options = {key: arg for key, arg in kwargs.items() if key not in ["name", "url"]}
+
+        self.retry = retry
+        self.breaker = breaker
+        self.coalesce = coalesce
+        self.instrument = instrument
+        self.titles_cache = titles_cache
+        self.dependents = {}
+
+        self.batch_endpoint = batch_endpoint
+
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+        self.session = self.accepting(session)
+
+    @property
+    def session(self):
+        """
+        The session given, else one made for the current thread
+        """
+
+        if self._session is not None:
+            return self._session
+
+        if getattr(self.local, "session", None) is None:
+            self.local.session = self.connect()
+
+        return self.local.session
+
+    @session.setter
+    def session(self, session):
+        """
+        Sets a session shared across threads
+        """
+
+        self._session = session
+
+    def connect(self):
+        """
+        Creates a session with pooled adapters and whatever options were sent
+        """
+
+        session = requests.Session()
+
+        adapter = self.pool.adapter()
+
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        for key, arg in self.options.items():
+            setattr(session, key, arg)
+
+        # Headers sent replace the session's, so they're copied, keeping whatever encodings they accept
+
+        if "headers" in self.options:
+            session.headers = requests.structures.CaseInsensitiveDict(session.headers)
+            session.headers.setdefault("Accept-Encoding", self.compression.accept)
+        else:
+            session.headers["Accept-Encoding"] = self.compression.accept
+
+        return session
+
+    @contextlib.contextmanager
+    def scope(self):
+        """
+        Keeps an identity map for retrieves in this thread until exited, answering retrieves one
+        by id from it and using the same models for the same records
+        """
+
+        previous = self.identity
+        self.local.scope = Scope()
+
+        try:
+            yield self.local.scope
+        finally:
+            self.local.scope = previous
+
+    @property
+    def identity(self):
+        """
+        The identity map in scope for this thread, if any
+        """
+
+        return getattr(self.local, "scope", None) if self.local is not None else None
+
+    @contextlib.contextmanager
+    def batch(self, endpoint=None):
+        """
+        Queues creates, counts, retrieves, updates, and deletes in this thread until exited, which return
+        futures instead, then sends them all as one request to the batch endpoint, filling each model
+        from its slot in the response
+        """
+
+        if self.batching is not None:
+            raise relations.ModelError(self.batching, "already batching")
+
+        batch = self.local.batch = Batch(endpoint or self.batch_endpoint)
+
+        # Whatever's queued fails with whatever's raised, rather than waiting forever
+
+        try:
+            yield batch
+        except Exception as exception:
+            batch.fail(exception)
+            raise
+        finally:
+            self.local.batch = None
+
+        self.flush(batch)
+
+    @property
+    def batching(self):
+        """
+        The batch queuing for this thread, if any
+        """
+
+        return getattr(self.local, "batch", None) if self.local is not None else None
+
+    def flush(self, batch):
+        """
+        Sends a batch, finishing each operation with the results of its slots, each checked like any
+        other response, and raising the first failure after finishing the rest
+        """
+
+        if not batch.operations:
+            return
+
+        calls = batch.calls()
+
+        try:
+
+            slots = self.send(batch, "responses", "post", batch.ENDPOINT, batch.body())
+
+            if len(slots) != len(calls):
+                raise relations.ModelError(batch, f"{len(slots)} responses for {len(calls)} requests")
+
+        except Exception as exception:
+            batch.fail(exception)
+            raise
+
+        finally:
+            for endpoint in {call[0].ENDPOINT for call in calls if call[2] != "get"}:
+                self.invalidate(endpoint)
+
+        failed = None
+        slot = 0
+
+        for operation, finish, undo, future in batch.operations:
+
+            try:
+                results = []
+                for model, key, _, _, _ in operation:
+                    results.append(self.unpack(model, key, self.check(model, slots[slot]["status"], slots[slot]["body"])))
+                    slot += 1
+                future.set_result(finish(results))
+            except Exception as exception:
+                batch.fail_operation(undo, future, exception)
+                failed = failed or exception
+
+        if failed is not None:
+            raise failed
+
+    @property
+    def executor(self):
+        """
+        Pool of workers, kept so their threads (and their sessions) are reused
+        """
+
+        with self.lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f"relations-rest-{self.name}", initializer=self.enlist
+                )
+
+        return self._executor
+
+    def enlist(self):
+        """
+        Marks the current thread as one of this source's workers
+        """
+
+        self.local.worker = True
+
+    def close(self):
+        """
+        Shuts down the pool of workers, once they're done, and closes the session made for this thread
+        """
+
+        with self.lock:
+            executor, self._executor = self._executor, None
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        if getattr(self.local, "session", None) is not None:
+            self.local.session.close()
+            self.local.session = None
+
+    def gather(self, call, items):
+        """
+        Calls with each item across a pool of workers, returning the results in order
+        Every call finishes before the first exception (if any) is raised
+        """
+
+        # Calls from a worker are made right there, as waiting on the pool from within could deadlock it
+
+        if len(items) < 2 or getattr(self.local, "worker", False):
+            return [call(item) for item in items]
+
+        futures = [self.executor.submit(call, item) for item in items]
+
+        concurrent.futures.wait(futures)
+
+        return [future.result() for future in futures]
+
+    def chunks(self, items):
+        """
+        Splits items into lists of chunk size, or just one list if no chunk
+        """
+
+        if not self.chunk:
+            return [items] if items else []
+
+        return [items[start:start + self.chunk] for start in range(0, len(items), self.chunk)]
+
+    def request(self, model, method, path, **kwargs): # pylint: disable=too-many-branches
+        """
+        Sends a request, retrying if it can and failing fast while the endpoint's circuit is open
+        """
+
+        retry = self.retry if self.retry is not None and method in self.retry.methods else None
+
+        attempt = 0
+
+        while True:
+
+            if self.breaker is not None and not self.breaker.allow(model.ENDPOINT):
+                raise relations.ModelError(model, f"circuit open for {model.ENDPOINT}")
+
+            start = time.perf_counter() if self.instrument is not None else None
+
+            try:
+
+                response = getattr(self.session, method)(f"{self.url}/{path}", **kwargs)
+
+            except requests.RequestException as exception:
+
+                if self.instrument is not None:
+                    self.emit(model, "request", method.upper(), start, path=path, attempt=attempt, error=str(exception))
+
+                if self.breaker is not None:
+                    self.breaker.failure(model.ENDPOINT)
+
+                if retry is None or attempt >= retry.retries:
+                    raise
+
+                time.sleep(retry.delay(attempt))
+                attempt += 1
+
+                continue
+
+            except Exception:
+
+                if self.breaker is not None:
+                    self.breaker.failure(model.ENDPOINT)
+
+                raise
+
+            # The outcome's recorded first, so nothing going wrong after leaves the circuit waiting on it
+
+            if self.breaker is not None:
+                if response.status_code == 429 or response.status_code >= 500:
+                    self.breaker.failure(model.ENDPOINT)
+                else:
+                    self.breaker.success(model.ENDPOINT)
+
+            if self.instrument is not None:
+                self.emit(
+                    model, "request", method.upper(), start, path=path, attempt=attempt, status=response.status_code,
+                    sent=len(kwargs["data"]) if "data" in kwargs else None, received=len(response.content)
+                )
+
+            if retry is None or response.status_code not in retry.statuses or attempt >= retry.retries:
+                return response
+
+            time.sleep(retry.delay(attempt, response))
+            attempt += 1
+
+    def get(self, model, body):
+        """
+        Gets a body from the model's endpoint, if conditional sending the validators
+        kept from last time and using the body kept with them if unchanged (304)
+        """
+
+        if self.conditional is None:
+            return self.decode(model, self.request(model, "get", model.ENDPOINT, json=body))
+
+        validated = self.conditional.get(self.scoped(model.ENDPOINT), body)
+
+        headers = {}
+
+        if validated is not None:
+            if validated["etag"] is not None:
+                headers["If-None-Match"] = validated["etag"]
+            if validated["modified"] is not None:
+                headers["If-Modified-Since"] = validated["modified"]
+
+        response = self.request(model, "get", model.ENDPOINT, json=body, headers=headers)
+
+        if response.status_code == 304 and validated is not None:
+            return validated["body"]
+
+        decoded = self.decode(model, response)
+
+        etag = response.headers.get("ETag")
+        modified = response.headers.get("Last-Modified")
+
+        if etag is not None or modified is not None:
+            self.conditional.set(self.scoped(model.ENDPOINT), body, {"etag": etag, "modified": modified, "body": decoded})
+
+        return decoded
+
+    def coalesced(self, model, body):
+        """
+        Gets a body, joining an identical get in flight if coalescing
+        """
+
+        if self.coalesce is None:
+            return self.get(model, body)
+
+        return self.coalesce.do(self.scoped(model.ENDPOINT), body, lambda: self.get(model, body))
+
+    def fetch(self, model, body):
+        """
+        Gets the result for a body from the model's endpoint, through the cache if there is one
+        """
+
+        if self.cache is None:
+            return self.unpack(model, model.PLURAL, self.coalesced(model, body))
+
+        endpoint = self.scoped(model.ENDPOINT)
+
+        # The generation's from before sending, so if what's sent is invalidated meanwhile, it isn't kept
+
+        generation = self.cache.generation(endpoint)
+        cached = self.cache.get(endpoint, body)
+
+        if cached is None:
+            cached = self.coalesced(model, body)
+            self.cache.set(endpoint, body, cached, generation)
+
+        return self.unpack(model, model.PLURAL, cached)
+
+    def send(self, model, key, method, path, body):
+        """
+        Sends a change and returns the result, clearing what's cached for the model's endpoint
+        """
+
+        try:
+            return self.result(model, key, self.request(model, method, path, **self.encode(body)))
+        finally:
+            if self.cache is not None or self.titles_cache is not None:
+                self.invalidate(model.ENDPOINT)
+
+    def scoped(self, endpoint):
+        """
+        What's kept for an endpoint is kept under, with the url, as caches can be shared by sources for different APIs
+        """
+
+        return f"{self.url}/{endpoint}"
+
+    def invalidate(self, endpoint):
+        """
+        Clears what's cached for an endpoint, and any titles depending on it
+        """
+
+        if self.cache is not None:
+            self.cache.invalidate(self.scoped(endpoint))
+        if self.titles_cache is not None:
+            self.invalidate_titles(endpoint)
+
+    def invalidate_titles(self, endpoint):
+        """
+        Removes cached titles for an endpoint and those whose titles have it as a parent
+        """
+
+        invalidating = [endpoint]
+        invalidated = set()
+
+        while invalidating:
+
+            endpoint = invalidating.pop()
+
+            if endpoint in invalidated:
+                continue
+
+            self.titles_cache.invalidate(self.scoped(endpoint))
+            invalidated.add(endpoint)
+
+            invalidating.extend(self.dependents.get(endpoint, []))
+
+    @staticmethod
+    def children(parents, parent_child):
+        """
+        Lists the children of parents for a relation, that have been loaded or added to
+        """
+
+        return [
+            parent._children[parent_child] for parent in parents
+            if parent._children.get(parent_child) is not None and parent._children[parent_child]._action != "retrieve"
+        ]
+
+    @staticmethod
+    def create_children(model, parents):
+        """
+        Creates the children of all the parents together, by relation rather than by parent
+        """
+
+        for parent_child, relation in model.CHILDREN.items():
+
+            children = Source.children(parents, parent_child)
+
+            creating = relation.Child(_mode="many")
+            creating._models = [child for children_model in children for child in children_model._each("create")]
+
+            if creating._models:
+                creating.create()
+
+            for children_model in children:
+                children_model._action = "update"
+
+    @staticmethod
+    def update_children(model, parents):
+        """
+        Creates and updates the children of all the parents together, by relation rather than by parent
+        """
+
+        # What to update is what's there before creating, so what's just been created isn't sent again
+
+        updatings = {
+            parent_child: [child for children_model in Source.children(parents, parent_child) for child in children_model._each("update")]
+            for parent_child in model.CHILDREN
+        }
+
+        Source.create_children(model, parents)
+
+        for parent_child, relation in model.CHILDREN.items():
+
+            if updatings[parent_child]:
+                updating = relation.Child(_mode="many", _action="update")
+                updating._models = updatings[parent_child]
+                updating.update()
+
+    @instrumented
+    def create(self, model):
+        """
+        Executes the create, in chunks sent at once if chunk is set
+        """
+
+        models = model._each("create")
+
+        # Batched, it's all in one slot, created or not together, and what's queued is taken off
+        # bulk right away, so adding past its size and creating again only queues what's new
+
+        batch = self.batching
+
+        if batch is not None:
+
+            models = [creating for creating in models if id(creating) not in batch.creating]
+
+            if not models:
+                queued = concurrent.futures.Future()
+                queued.set_result(model)
+                return queued
+
+            batch.creating.update(id(creating) for creating in models)
+
+            if model._bulk:
+                model._models = [each for each in model._models if id(each) not in batch.creating]
+
+            def finish(results):
+
+                self.create_ids(model, models, results[0])
+
+                if not model._bulk:
+                    self.create_children(model, models)
+                    model._action = "update"
+
+                return model
+
+            def undo():
+
+                if model._bulk:
+                    model._models[:0] = models
+
+            return batch.queue(
+                [(model, model.PLURAL, "post", model.ENDPOINT, {model.PLURAL: self.create_values(models)})], finish, undo
+            )
+
+        chunks = self.chunks(models)
+
+        def post(chunk):
+
+            # Whatever goes wrong is just this chunk's failure, so the ids of those that didn't are still set
+
+            try:
+                return self.send(model, model.PLURAL, "post", model.ENDPOINT, {model.PLURAL: self.create_values(chunk)})
+            except Exception as exception:
+                return exception
+
+        failed = None
+        created = []
+
+        for chunk, records in zip(chunks, self.gather(post, chunks)):
+
+            if isinstance(records, Exception):
+                failed = failed or records
+                continue
+
+            self.create_ids(model, chunk, records)
+            created.extend(chunk)
+
+        if not model._bulk:
+            self.create_children(model, created)
+
+        # Whatever failed is left to create again, with the error saying how many made it
+
+        if failed is not None:
+            if model._bulk:
+                model._models = model._each("create")
+            raise relations.ModelError(model, f"{getattr(failed, 'message', failed)}, created {len(created)} of {len(models)}")
+
+        return self.created(model)
+
+    @instrumented
+    def count(self, model):
+        """
+        Executes the retrieve
+        """
+
+        if self.batching is not None:
+            return self.batching.queue([(model, model.PLURAL, "get", model.ENDPOINT, self.count_body(model))], lambda results: results[0])
+
+        return self.fetch(model, self.count_body(model))
+
+    @staticmethod
+    def pending(record):
+        """
+        Whether a record has changes not yet saved
+        """
+
+        return any(field.delta() for field in record._order)
+
+    def refresh(self, mapped, match):
+        """
+        Reads a match into what's mapped, unless it has changes not yet saved, which are kept
+        """
+
+        if not self.pending(mapped._record):
+            mapped._record.read(match)
+
+        return mapped
+
+    def identify(self, model, match):
+        """
+        Maps a model retrieved one, or if one's mapped for its record, shares its record, refreshed
+        """
+
+        identity = self.identity
+
+        if identity is None or model._id is None:
+            return
+
+        mapped = identity.setdefault(model.ENDPOINT, model._record[model._id], model)
+
+        if mapped is not model:
+            model._record = self.refresh(mapped, match)._record
+
+    def identified(self, model, body):
+        """
+        Fills in a model retrieved one by id from the identity map, True if it was there
+        """
+
+        identity = self.identity
+
+        if identity is None or model._id is None or model._mode != "one" or model._role == "child":
+            return False
+
+        if list(body["filter"]) != [f"{model._id}__eq"]:
+            return False
+
+        mapped = identity.get(model.ENDPOINT, body["filter"][f"{model._id}__eq"])
+
+        if mapped is None:
+            return False
+
+        model._record = mapped._record
+        model._action = "update"
+
+        return True
+
+    def build(self, model, match, fields=None):
+        """
+        Builds a model from a match, partial if projected, and if in scope, the one mapped for its record
+        """
+
+        identity = self.identity
+
+        if fields is not None or identity is None or model._id is None:
+            return super().build(model, match, fields)
+
+        mapped = identity.get(model.ENDPOINT, match.get(model._fields._names[model._id].store))
+
+        if mapped is not None:
+            return self.refresh(mapped, match)
+
+        built = model.__class__(_read=match)
+
+        return identity.setdefault(model.ENDPOINT, built[model._id], built)
+
+    def retrieve_stream(self, model, per_page, fields=None):
+        """
+        Retrieves a page at a time, yielding models as each page arrives
+        """
+
+        body = self.retrieve_body(model, fields)
+
+        overflow = model.overflow
+        start = model._offset or 0
+        remaining = model._limit
+        retrieved = 0
+
+        while remaining is None or remaining > 0:
+
+            size = per_page if remaining is None else min(per_page, remaining)
+            body["limit"] = {"per_page": size, "start": start}
+
+            # Pages are only passed through, so they're not cached
+
+            matches = self.unpack(model, model.PLURAL, self.coalesced(model, body))
+
+            # Full pages always overflow, so only the overall limit counts
+
+            model.overflow = overflow
+
+            for match in matches:
+                retrieved += 1
+                yield self.build(model, match, fields)
+
+            if len(matches) < size:
+                break
+
+            start += size
+
+            if remaining is not None:
+                remaining -= size
+
+        if model._limit is not None:
+            model.overflow = model.overflow or retrieved >= model._limit
+
+    def retrieve_parallel(self, model, per_page, fields=None):
+        """
+        Counts what matches and then retrieves all the pages at once, in the order of a single retrieve
+        """
+
+        body = self.retrieve_body(model, fields)
+
+        total = model._total = self.fetch(model, {"filter": body["filter"], "count": True})
+
+        start = model._offset or 0
+        end = total if model._limit is None else min(total, start + model._limit)
+
+        def page(offset):
+
+            return self.fetch(model, {**body, "limit": {"per_page": min(per_page, end - offset), "start": offset}})
+
+        # Full pages always overflow, so only the overall limit counts
+
+        overflow = model.overflow
+
+        matches = [match for matches in self.gather(page, list(range(start, end, per_page))) for match in matches]
+
+        model.overflow = overflow
+
+        if model._limit is not None:
+            model.overflow = model.overflow or len(matches) >= model._limit
+
+        return matches
+
+    @instrumented
+    def retrieve(self, model, verify=True, stream=False, parallel=False, fields=None, lazy=False, total=False, include=None, # pylint: disable=too-many-branches
+                 cursor=None):
+        """
+        Executes the retrieve, or if streaming returns a generator of models, a page (stream or CHUNK) at a time
+        If parallel, counts first and retrieves pages (parallel or CHUNK) concurrently
+        If fields, retrieves only those, and the id, reading any others raises
+        If lazy, many models are only built as they're accessed
+        If total, asks for the count of all that match with the page, setting _total, counting
+        separately if the API doesn't send it (parallel always sets _total)
+        If include, retrieves those parents and children for all the models at once, one retrieve each
+        If cursor, True to start or a _cursor to continue, pages by the first sort (else id) rather
+        than offset, setting _cursor to continue with if there might be more, None if not
+        """
+
+        if (stream or parallel) and model._mode == "one":
+            raise relations.ModelError(model, f"cannot {'stream' if stream else 'parallel'} one")
+
+        if (stream or parallel) and self.batching is not None:
+            raise relations.ModelError(model, f"cannot {'stream' if stream else 'parallel'} in a batch")
+
+        if stream and include:
+            raise relations.ModelError(model, "cannot include when streaming")
+
+        for name in include or []:
+            if name not in model.PARENTS and name not in model.CHILDREN:
+                raise relations.ModelError(model, f"unknown relation '{name}'")
+
+        if fields is not None:
+            fields = self.project(model, fields)
+
+        if cursor is not None:
+            return self.retrieve_keyset(model, cursor, verify, fields, lazy, total, include)
+
+        if stream:
+            return self.retrieve_stream(model, model._chunk if stream is True else stream, fields)
+
+        if parallel:
+            matches = self.retrieve_parallel(model, model._chunk if parallel is True else parallel, fields)
+            return self.prefetch(self.retrieve_models(model, matches, verify, fields, lazy), include)
+
+        body = self.retrieve_body(model, fields)
+
+        if total:
+            body["total"] = True
+            model._total = None
+
+        # Batched, there's no counting separately, so _total's only set if the API sends it
+
+        if self.batching is not None:
+            return self.batching.queue(
+                [(model, model.PLURAL, "get", model.ENDPOINT, body)],
+                lambda results: self.prefetch(self.retrieve_models(model, results[0], verify, fields, lazy), include)
+            )
+
+        if fields is None and not total and self.identified(model, body):
+            return self.prefetch(model, include)
+
+        matches = self.fetch(model, body)
+
+        if total and model._total is None:
+            model._total = self.fetch(model, {"filter": body["filter"], "count": True})
+
+        return self.prefetch(self.retrieve_models(model, matches, verify, fields, lazy), include)
+
+    @staticmethod
+    def continuation(sort, after, id=None):
+        """
+        Token to continue paging by a sort after a value, and an id if the sort isn't by id
+        """
+
+        continuing = {"sort": sort, "after": after}
+
+        if id is not None:
+            continuing["id"] = id
+
+        return base64.urlsafe_b64encode(json.dumps(continuing, separators=(",", ":")).encode()).decode()
+
+    @staticmethod
+    def continued(model, sort, cursor):
+        """
+        The value, and id, to continue after from a token, which has to be for the same sort
+        """
+
+        try:
+            continuing = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except ValueError as exception:
+            raise relations.ModelError(model, f"invalid cursor {cursor}") from exception
+
+        if not isinstance(continuing, dict) or "after" not in continuing:
+            raise relations.ModelError(model, f"invalid cursor {cursor}")
+
+        if continuing.get("sort") != sort:
+            raise relations.ModelError(model, f"cursor not for sort {sort}")
+
+        return continuing["after"], continuing.get("id")
+
+    def retrieve_keyset(self, model, cursor, verify, fields, lazy, total, include): # pylint: disable=too-many-locals,too-many-branches
+        """
+        Retrieves a page after where the cursor left off, filtering on the sort key rather than
+        skipping with an offset, so every page is as fast as the first and nothing's skipped or
+        repeated as records are added or removed
+
+        Sorting by anything but the id, ties are broken by id, so a page continues with the rest
+        of the tied (sort equal, id after) and then, if there's room, those after (sort after)
+
+        If total, _total is of all that match, wherever the cursor is
+        """
+
+        if model._mode == "one" or model._offset or self.batching is not None:
+            raise relations.ModelError(model, "cursor only retrieves many, without an offset or batching")
+
+        sort = model._sort[0] if model._sort else f"+{model._id}"
+        name = sort[1:]
+
+        if model._sort and model._sort[1:] and model._sort[1:] != [f"+{model._id}"]:
+            raise relations.ModelError(model, "cursor only pages by one sort")
+
+        model._sort = [sort] if name == model._id else [sort, f"+{model._id}"]
+
+        if model._limit is None:
+            model._limit = model._chunk
+
+        if fields is not None and name not in fields:
+            fields.append(name)
+
+        body = self.retrieve_body(model, fields)
+        criteria = body["filter"]
+
+        past = f"{name}__{'lt' if sort[0] == '-' else 'gt'}"
+
+        if cursor is True:
+
+            matches = self.fetch(model, body)
+
+        else:
+
+            after, id = self.continued(model, sort, cursor)
+
+            if name == model._id:
+
+                matches = self.fetch(model, {**body, "filter": {**criteria, past: after}})
+
+            else:
+
+                if id is None:
+                    raise relations.ModelError(model, f"invalid cursor {cursor}")
+
+                matches = self.fetch(model, {**body, "filter": {**criteria, f"{name}__eq": after, f"{model._id}__gt": id}})
+
+                if len(matches) < model._limit:
+                    matches.extend(self.fetch(model, {
+                        **body, "filter": {**criteria, past: after}, "limit": {"per_page": model._limit - len(matches)}
+                    }))
+
+        if total:
+            model._total = self.fetch(model, {"filter": criteria, "count": True})
+
+        names = model._fields._names
+        store = names[name].store if name in names else name
+
+        if matches and len(matches) >= model._limit:
+            last = matches[-1]
+            model._cursor = self.continuation(sort, last[store], None if name == model._id else last[names[model._id].store])
+        else:
+            model._cursor = None
+
+        return self.prefetch(self.retrieve_models(model, matches, verify, fields, lazy), include)
+
+    def related(self, related):
+        """
+        Retrieves the matches for relatives, all of them even if more than a page
+        """
+
+        matches = self.fetch(related, self.retrieve_body(related))
+
+        if related.overflow:
+            related.overflow = False
+            matches = self.retrieve_parallel(related, related._chunk)
+
+        return matches
+
+    def relatives(self, relative, field, values):
+        """
+        Retrieves the relative's matches whose field is in values, in chunks sent at once if chunk
+        is set, as pairs of what the field is stored as and the match
+        """
+
+        def retrieve(chunk):
+
+            related = relative.many(**{f"{field}__in": chunk})
+            store = related._fields._names[field].store
+
+            return [(match[store], match) for match in self.related(related)]
+
+        return [pair for pairs in self.gather(retrieve, self.chunks(values)) for pair in pairs]
+
+    def prefetch(self, model, include): # pylint: disable=too-many-branches
+        """
+        Retrieves the parents and children included for all the models retrieved at once, one
+        retrieve for each, setting them as if they were retrieved as each was accessed
+
+        Each is retrieved through its own source, and if that isn't a (sync) REST one,
+        left to retrieve itself as usual
+        """
+
+        if model is None or not include:
+            return model
+
+        models = model._each()
+
+        for name in include:
+
+            if name in model.PARENTS:
+
+                relation = model.PARENTS[name]
+                source = relations.source(relation.Parent.SOURCE)
+
+                if not isinstance(source, Source):
+                    continue
+
+                values = list(dict.fromkeys(
+                    each[relation.child_field] for each in models if each[relation.child_field] is not None
+                ))
+
+                if not values:
+                    continue
+
+                matches = dict(source.relatives(relation.Parent, relation.parent_field, values))
+
+                for each in models:
+                    if each[relation.child_field] in matches:
+                        parent = relation.Parent(_child={relation.parent_field: each[relation.child_field]})
+                        each._parents[name] = source.retrieve_models(parent, [matches[each[relation.child_field]]])
+
+            else:
+
+                relation = model.CHILDREN[name]
+                source = relations.source(relation.Child.SOURCE)
+
+                if not isinstance(source, Source):
+                    continue
+
+                values = list(dict.fromkeys(
+                    each[relation.parent_field] for each in models if each[relation.parent_field] is not None
+                ))
+
+                if not values:
+                    continue
+
+                matches = {value: [] for value in values}
+
+                for value, match in source.relatives(relation.Child, relation.child_field, values):
+                    matches[value].append(match)
+
+                for each in models:
+                    if each[relation.parent_field] is not None:
+                        child = relation.Child(_parent={relation.child_field: each[relation.parent_field]}, _mode=relation.MODE)
+                        each._children[name] = source.retrieve_models(child, matches[each[relation.parent_field]])
+
+        return model
+
+    @instrumented
+    def titles(self, model):
+        """
+        Creates the titles structure, retrieving only the fields needed and through the titles cache if there is one
+        """
+
+        key = generation = None
+
+        if model._action == "retrieve":
+
+            fields = self.project(model, self.titles_fields(model))
+
+            if self.titles_cache is not None:
+
+                key = self.retrieve_body(model, fields)
+                generation = self.titles_cache.generation(self.scoped(model.ENDPOINT))
+                cached = self.titles_cache.get(self.scoped(model.ENDPOINT), key)
+
+                if cached is not None:
+                    return cached
+
+            self.retrieve(model, fields=fields)
+
+        titles = relations.Titles(model)
+
+        for titling in model._each():
+            titles.add(titling)
+
+        if key is not None:
+
+            for field in titles.parents:
+                endpoint = getattr(model._ancestor(field).Parent.many(), "ENDPOINT", None)
+                if endpoint is not None:
+                    self.dependents.setdefault(endpoint, set()).add(model.ENDPOINT)
+
+            self.titles_cache.set(self.scoped(model.ENDPOINT), key, titles, generation)
+
+        return titles
+
+    @instrumented
+    def update(self, model): # pylint: disable=too-many-branches
+        """
+        Executes the update, if bulk sending changes by id in chunks to the plural endpoint
+        """
+
+        # If the overall model is retrieving and the record has values set
+
+        updated = 0
+
+        identity = self.identity
+
+        if model._action == "retrieve" and model._record._action == "update":
+
+            if self.batching is not None:
+
+                def finish(results):
+
+                    if identity is not None:
+                        identity.evict(model.ENDPOINT)
+
+                    return results[0]
+
+                return self.batching.queue([(model, "updated", "patch", model.ENDPOINT, self.mass_body(model))], finish)
+
+            updated += self.send(model, "updated", "patch", model.ENDPOINT, self.mass_body(model))
+
+            if identity is not None:
+                identity.evict(model.ENDPOINT)
+
+        elif model._id:
+
+            updatings = model._each("update")
+
+            # Anything mapped that's not what's updated is now out of date
+
+            if identity is not None:
+                for updating in updatings:
+                    mapped = identity.get(model.ENDPOINT, updating[model._id])
+                    if mapped is not None and mapped._record is not updating._record:
+                        identity.evict(model.ENDPOINT, updating[model._id])
+
+            # Batched, bulk is all in one slot, otherwise a slot for each
+
+            if self.batching is not None:
+
+                if self.bulk:
+                    calls = [(model, "updated", "patch", model.ENDPOINT, self.bulk_body(model, updatings))]
+                else:
+                    calls = [
+                        (updating, "updated", "patch", f"{model.ENDPOINT}/{updating[model._id]}", self.update_body(updating))
+                        for updating in updatings
+                    ]
+
+                def finish(results):
+
+                    self.update_children(model, updatings)
+
+                    return sum(results)
+
+                return self.batching.queue(calls, finish)
+
+            if self.bulk:
+
+                updated += sum(self.gather(
+                    lambda chunk: self.send(model, "updated", "patch", model.ENDPOINT, self.bulk_body(model, chunk)),
+                    self.chunks(updatings)
+                ))
+
+            else:
+
+                for updating in updatings:
+                    updated += self.send(
+                        updating, "updated", "patch", f"{model.ENDPOINT}/{updating[model._id]}", self.update_body(updating)
+                    )
+
+            self.update_children(model, updatings)
+
+        else:
+
+            raise relations.ModelError(model, "nothing to update from")
+
+        return updated
+
+    @instrumented
+    def delete(self, model):
+        """
+        Executes the delete, by id in chunks sent at once if chunk is set
+        """
+
+        if model._action == "retrieve":
+
+            body = self.mass_delete_body(model)
+            identity = self.identity
+
+            def evict(deleted):
+
+                if identity is not None:
+                    identity.evict(model.ENDPOINT)
+
+                return deleted
+
+            if self.batching is not None:
+                return self.batching.queue(
+                    [(model, "deleted", "delete", model.ENDPOINT, body)], lambda results: evict(results[0])
+                )
+
+            return evict(self.send(model, "deleted", "delete", model.ENDPOINT, body))
+
+        if not model._id:
+            raise relations.ModelError(model, "nothing to delete from")
+
+        identity = self.identity
+
+        def removed(chunk, deleted):
+
+            for deleting in chunk:
+                deleting._action = "create"
+                if identity is not None:
+                    identity.evict(model.ENDPOINT, deleting[model._id])
+
+            return deleted
+
+        # Batched, it's all in one slot
+
+        if self.batching is not None:
+
+            deletings = model._each()
+
+            def finish(results):
+
+                removed(deletings, results[0])
+                model._action = "create"
+
+                return results[0]
+
+            return self.batching.queue([(model, "deleted", "delete", model.ENDPOINT, self.delete_body(model, deletings))], finish)
+
+        def remove(chunk):
+
+            return removed(chunk, self.send(model, "deleted", "delete", model.ENDPOINT, self.delete_body(model, chunk)))
+
+        deleted = sum(self.gather(remove, self.chunks(model._each())))
+
+        model._action = "create"
+
+        return deleted
@@ -0,0 +1,199 @@
+"""
+Pooling, timing out, retrying and breaking circuits for REST sources
+"""
+
+import time
+import random
+import threading
+import email.utils
+
+import requests.adapters
+
+class Adapter(requests.adapters.HTTPAdapter):
+    """
+    HTTPAdapter with a default timeout, a float or (connect, read) tuple
+    """
+
+    timeout = None
+
+    def __init__(self, timeout=None, **kwargs):
+
+        self.timeout = timeout
+
+        super().__init__(**kwargs)
+
+    def send(self, request, timeout=None, **kwargs): # pylint: disable=arguments-differ
+        """
+        Sends with the default timeout unless one's given
+        """
+
+        return super().send(request, timeout=self.timeout if timeout is None else timeout, **kwargs)
+
+class Pool: # pylint: disable=too-few-public-methods
+    """
+    Connections kept per host, how many at most, whether to wait for one when all
+    are in use, and the default timeout, a float or (connect, read) tuple
+    """
+
+    connections = None
+    maxsize = None
+    block = None
+    timeout = None
+
+    def __init__(self, connections=10, maxsize=10, block=False, timeout=None):
+
+        self.connections = connections
+        self.maxsize = maxsize
+        self.block = block
+        self.timeout = timeout
+
+    def adapter(self):
+        """
+        An adapter pooling and timing out as such
+        """
+
+        return Adapter(
+            timeout=self.timeout,
+            pool_connections=self.connections,
+            pool_maxsize=self.maxsize,
+            pool_block=self.block
+        )
+
+class Retry: # pylint: disable=too-few-public-methods
+    """
+    When and how long to wait to try again, backing off exponentially with
+    full jitter unless the server says how long with Retry-After
+    """
+
+    retries = None
+    backoff = None
+    cap = None
+    jitter = None
+    statuses = None
+    methods = None
+
+    def __init__(self, retries=3, backoff=0.5, cap=30, jitter=True, statuses=(429, 502, 503, 504), methods=("get",)):
+
+        self.retries = retries
+        self.backoff = backoff
+        self.cap = cap
+        self.jitter = jitter
+        self.statuses = statuses
+        self.methods = methods
+
+    def delay(self, attempt, response=None):
+        """
+        Seconds to wait before trying again
+        """
+
+        after = response.headers.get("Retry-After") if response is not None else None
+
+        # Seconds, or an HTTP date, and if neither, backing off as if not sent
+
+        if after is not None:
+
+            try:
+                return min(self.cap, max(0, float(after)))
+            except ValueError:
+                pass
+
+            try:
+                return min(self.cap, max(0, email.utils.parsedate_to_datetime(after).timestamp() - time.time()))
+            except (TypeError, ValueError, IndexError, OverflowError):
+                pass
+
+        delay = min(self.cap, self.backoff * 2 ** attempt)
+
+        return random.uniform(0, delay) if self.jitter else delay
+
+class Breaker:
+    """
+    Circuit breaker by endpoint, opening after threshold failures in a row to fail fast,
+    then after reset seconds half opening to let one request try
+    """
+
+    threshold = None
+    reset = None
+
+    def __init__(self, threshold=5, reset=30):
+
+        self.threshold = threshold
+        self.reset = reset
+
+        self.circuits = {}
+        self.lock = threading.Lock()
+
+    def circuit(self, endpoint):
+        """
+        Gets the circuit for an endpoint, must have lock
+        """
+
+        if endpoint not in self.circuits:
+            self.circuits[endpoint] = {"state": "closed", "failures": 0, "opened": None}
+
+        return self.circuits[endpoint]
+
+    def allow(self, endpoint):
+        """
+        Whether a request can be sent
+        """
+
+        with self.lock:
+
+            circuit = self.circuit(endpoint)
+
+            if circuit["state"] == "closed":
+                return True
+
+            # A trial that never reports back doesn't hold the circuit half open, as another's let try after reset
+
+            if time.monotonic() >= circuit["opened"] + self.reset:
+                circuit["state"] = "half-open"
+                circuit["opened"] = time.monotonic()
+                return True
+
+            return False
+
+    def success(self, endpoint):
+        """
+        Closes the circuit
+        """
+
+        with self.lock:
+            circuit = self.circuit(endpoint)
+            circuit["state"] = "closed"
+            circuit["failures"] = 0
+            circuit["opened"] = None
+
+    def failure(self, endpoint):
+        """
+        Counts a failure, opening the circuit if too many or trying while half open
+        """
+
+        with self.lock:
+
+            circuit = self.circuit(endpoint)
+            circuit["failures"] += 1
+
+            if circuit["state"] == "half-open" or circuit["failures"] >= self.threshold:
+                circuit["state"] = "open"
+                circuit["opened"] = time.monotonic()
+
+    def state(self, endpoint):
+        """
+        State of an endpoint's circuit
+        """
+
+        with self.lock:
+            return self.circuit(endpoint)["state"]
+
+    def states(self):
+        """
+        States and failures of all circuits, for monitoring
+        """
+
+        with self.lock:
+            return {
+                endpoint: {"state": circuit["state"], "failures": circuit["failures"]}
+                for endpoint, circuit in self.circuits.items()
+            }
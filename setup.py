@@ -16,13 +16,17 @@ setup(
     name="relations-rest",
     version=version,
     package_dir = {'': 'lib'},
-    py_modules = [
+    packages = [
         'relations_rest'
     ],
     install_requires=[
         'requests==2.25.1',
         'relations-dil==0.6.12'
     ],
+    extras_require={
+        'async': ['httpx==0.23.3'],
+        'fast': ['orjson==3.8.3']
+    },
     url="https://github.com/relations-dil/python-relations-rest",
     author="Gaffer Fitch",
     author_email="relations@gaf3.com",
@@ -0,0 +1,207 @@
+"""
+Benchmarks Source against the same flask stand-in the tests use, writing JSON results
+
+    python test/benchmark_relations_rest.py --records 1 100 1000 --output benchmark.json
+    python test/benchmark_relations_rest.py --records 1 100 1000 --baseline benchmark.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+
+import relations_rest
+
+import test_relations_rest
+
+SHAPES = {
+    "Simple": (
+        test_relations_rest.Simple,
+        lambda index: {"name": f"simple{index}"},
+        {"name": "changed"}
+    ),
+    "Meta": (
+        test_relations_rest.Meta,
+        lambda index: {
+            "name": f"meta{index}",
+            "flag": bool(index % 2),
+            "spend": index / 3,
+            "people": {"tom", "mary"},
+            "stuff": [index, {"relations.io": {"1": "sure"}}],
+            "things": {"a": {"b": [1, 2], "c": "sure"}, "for": [{"1": index}]}
+        },
+        {"flag": True}
+    ),
+    "Net": (
+        test_relations_rest.Net,
+        lambda index: {"ip": f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}", "subnet": "10.0.0.0/8"},
+        {"subnet": "192.168.0.0/16"}
+    )
+}
+
+OPERATIONS = ["create", "count", "retrieve", "retrieve_lazy", "retrieve_filter", "titles", "update", "delete"]
+
+class Bench:
+    """
+    A fresh stand-in API and Source, like each test gets
+    """
+
+    def __init__(self):
+
+        test_relations_rest.TestSource.setUp(self)
+
+def cycle(shape, records):
+    """
+    Runs each operation once over records, returning seconds for each and the rows each did
+    """
+
+    model, record, change = SHAPES[shape]
+
+    Bench()
+
+    seconds = {}
+    rows = {}
+
+    def timed(operation, call, done=len):
+
+        start = time.perf_counter()
+        result = call()
+        seconds[operation] = time.perf_counter() - start
+        rows[operation] = done(result)
+
+        return result
+
+    timed("create", lambda: model([record(index) for index in range(records)]).create(), lambda created: records)
+
+    if timed("count", lambda: model.many().count(), lambda counted: records) != records:
+        raise RuntimeError(f"{shape} counted wrong")
+
+    # The stand-in, like the real thing, sends a page (CHUNK) at most, so retrieve them all
+
+    if len(timed("retrieve", lambda: model.many().retrieve(parallel=True))) != records:
+        raise RuntimeError(f"{shape} retrieved wrong")
+
+    # Retrieving to count, where lazy building pays off
+
+    if len(timed("retrieve_lazy", lambda: model.many().retrieve(parallel=True, lazy=True))) != records:
+        raise RuntimeError(f"{shape} lazily retrieved wrong")
+
+    # Retrieving to filter, where each is built as it's looked at, so every row counts
+
+    filtered = timed(
+        "retrieve_filter",
+        lambda: [each for each in model.many().retrieve(parallel=True, lazy=True) if each.id % 10 == 1],
+        lambda kept: records
+    )
+
+    if len(filtered) != (records + 9) // 10:
+        raise RuntimeError(f"{shape} filtered wrong")
+
+    # Titles of the first page, so only those titled count
+
+    timed("titles", lambda: model.many().titles())
+    timed("update", lambda: model.many().set(**change).update(), lambda updated: updated)
+    timed("delete", lambda: model.many().delete(), lambda deleted: deleted)
+
+    return seconds, rows
+
+def benchmark(shapes, counts, repeat):
+    """
+    Benchmarks every shape at every count, repeat times
+    """
+
+    results = []
+
+    for shape in shapes:
+        for records in counts:
+
+            runs = [cycle(shape, records) for _ in range(repeat)]
+
+            for operation in OPERATIONS:
+
+                seconds = [run[operation] for run, _ in runs]
+                rows = runs[0][1][operation]
+
+                results.append({
+                    "shape": shape,
+                    "records": records,
+                    "operation": operation,
+                    "rows": rows,
+                    "repeat": repeat,
+                    "min": min(seconds),
+                    "median": statistics.median(seconds),
+                    "max": max(seconds),
+                    "records_per_second": rows / min(seconds) if min(seconds) else None
+                })
+
+                print(f"{shape:<6} {records:>7} {operation:<15} {min(seconds) * 1000:>10.2f}ms", file=sys.stderr)
+
+    return results
+
+def regressions(results, baseline, tolerance):
+    """
+    Results slower than the baseline's by more than tolerance, a fraction
+    """
+
+    previous = {
+        (result["shape"], result["records"], result["operation"]): result["min"]
+        for result in baseline["results"]
+    }
+
+    slower = []
+
+    for result in results:
+
+        key = (result["shape"], result["records"], result["operation"])
+
+        if key in previous and result["min"] > previous[key] * (1 + tolerance):
+            slower.append({**result, "baseline": previous[key]})
+
+    return slower
+
+def main(args=None):
+    """
+    Parses arguments, benchmarks, and writes the results
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmarks relations-rest Source CRUD against a local stand-in API")
+    parser.add_argument("--shapes", nargs="+", choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument("--records", nargs="+", type=int, default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="file to write to, stdout if not sent")
+    parser.add_argument("--baseline", help="earlier results to compare to, exiting 1 if anything's slower")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="how much slower than the baseline is ok")
+
+    args = parser.parse_args(args)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "codec": "orjson" if relations_rest.Codec().fast else "json",
+        "started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": benchmark(args.shapes, args.records, args.repeat)
+    }
+
+    if args.baseline:
+        with open(args.baseline, "r") as baseline:
+            report["regressions"] = regressions(report["results"], json.load(baseline), args.tolerance)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    for regression in report.get("regressions", []):
+        print(
+            f"slower {regression['shape']} {regression['records']} {regression['operation']} "
+            f"{regression['min'] * 1000:.2f}ms vs {regression['baseline'] * 1000:.2f}ms",
+            file=sys.stderr
+        )
+
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,22 @@
+import os
+import gzip
+import sqlite3
+import inspect
+import tempfile
+import json
+import zlib
 import unittest
 import unittest.mock
 import relations.unittest
 
 import flask
 import flask_restx
+import httpx
 
+import time
 import ipaddress
+import threading
+import requests
 
 import relations
 import relations_restx
@@ -81,6 +92,689 @@ class Case(SourceModel):
 relations.OneToMany(Unit, Test)
 relations.OneToOne(Test, Case)
 
+class Response:
+    """
+    Makes a flask test response look like a requests one
+    """
+
+    def __init__(self, response):
+
+        self.response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.data
+
+    def json(self):
+
+        return self.response.json
+
+class Session:
+    """
+    Makes the flask test client look like a requests session
+    """
+
+    def __init__(self, client):
+
+        self.client = client
+
+    def get(self, url, **kwargs):
+
+        return Response(self.client.get(url, **kwargs))
+
+    def post(self, url, **kwargs):
+
+        return Response(self.client.post(url, **kwargs))
+
+    def patch(self, url, **kwargs):
+
+        return Response(self.client.patch(url, **kwargs))
+
+    def delete(self, url, **kwargs):
+
+        return Response(self.client.delete(url, **kwargs))
+
+class WSGITransport(httpx.AsyncBaseTransport):
+    """
+    Lets an httpx.AsyncClient call the flask app in process
+    """
+
+    def __init__(self, app):
+
+        self.transport = httpx.WSGITransport(app=app)
+
+    async def handle_async_request(self, request):
+
+        await request.aread()
+
+        response = self.transport.handle_request(request)
+
+        return httpx.Response(response.status_code, headers=response.headers, content=response.read())
+
+class TestCache(unittest.TestCase):
+
+    def test___init__(self):
+
+        cache = relations_rest.Cache()
+        self.assertEqual(cache.size, 1000)
+        self.assertEqual(cache.ttl, 60)
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 0, "misses": 0, "evictions": 0})
+
+        cache = relations_rest.Cache(size=10, ttl=5)
+        self.assertEqual(cache.size, 10)
+        self.assertEqual(cache.ttl, 5)
+
+    def test_key(self):
+
+        self.assertEqual(
+            relations_rest.Cache.key("unit", {"filter": {"b": 2, "a": 1}, "count": True}),
+            relations_rest.Cache.key("unit", {"count": True, "filter": {"a": 1, "b": 2}})
+        )
+
+        self.assertNotEqual(
+            relations_rest.Cache.key("unit", {"filter": {}}),
+            relations_rest.Cache.key("test", {"filter": {}})
+        )
+
+    @unittest.mock.patch("time.monotonic")
+    def test_get(self, mock_monotonic):
+
+        mock_monotonic.return_value = 100
+
+        cache = relations_rest.Cache(ttl=5)
+
+        self.assertIsNone(cache.get("unit", {"filter": {}}))
+
+        value = {"units": [{"id": 1}]}
+        cache.set("unit", {"filter": {}}, value)
+
+        cached = cache.get("unit", {"filter": {}})
+        self.assertEqual(cached, value)
+
+        cached["units"].append({"id": 2})
+        self.assertEqual(cache.get("unit", {"filter": {}}), value)
+
+        mock_monotonic.return_value = 106
+        self.assertIsNone(cache.get("unit", {"filter": {}}))
+
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 2, "misses": 2, "evictions": 0})
+
+    def test_set(self):
+
+        cache = relations_rest.Cache(size=2)
+
+        value = {"units": 1}
+        cache.set("unit", {"a": 1}, value)
+        value["units"] = 2
+        self.assertEqual(cache.get("unit", {"a": 1}), {"units": 1})
+
+        cache.set("unit", {"b": 2}, {"units": 2})
+        cache.get("unit", {"a": 1})
+        cache.set("unit", {"c": 3}, {"units": 3})
+
+        self.assertEqual(cache.get("unit", {"a": 1}), {"units": 1})
+        self.assertIsNone(cache.get("unit", {"b": 2}))
+        self.assertEqual(cache.get("unit", {"c": 3}), {"units": 3})
+
+        self.assertEqual(cache.stats(), {"size": 2, "hits": 4, "misses": 1, "evictions": 1})
+
+    def test_invalidate(self):
+
+        cache = relations_rest.Cache()
+
+        cache.set("unit", {"a": 1}, {"units": 1})
+        cache.set("unit", {"b": 2}, {"units": 2})
+        cache.set("test", {"a": 1}, {"tests": 1})
+
+        generation = cache.generation("unit")
+
+        cache.invalidate("unit")
+
+        self.assertIsNone(cache.get("unit", {"a": 1}))
+        self.assertIsNone(cache.get("unit", {"b": 2}))
+        self.assertEqual(cache.get("test", {"a": 1}), {"tests": 1})
+
+        # what was fetched before invalidating isn't kept
+
+        self.assertEqual(cache.generation("unit"), generation + 1)
+
+        cache.set("unit", {"a": 1}, {"units": 1}, generation)
+        self.assertIsNone(cache.get("unit", {"a": 1}))
+
+        cache.set("unit", {"a": 1}, {"units": 1}, generation + 1)
+        self.assertEqual(cache.get("unit", {"a": 1}), {"units": 1})
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+
+        self.directory.cleanup()
+
+    def test___init__(self):
+
+        cache = relations_rest.DiskCache(f"{self.directory.name}/cache")
+        self.assertEqual(cache.path, f"{self.directory.name}/cache/relations-rest.sqlite")
+        self.assertEqual(cache.size, 10000)
+        self.assertEqual(cache.ttl, 60)
+        self.assertEqual(cache.stats(), {"size": 0, "hits": 0, "misses": 0, "evictions": 0, "errors": 0})
+        self.assertEqual(cache.connection.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(os.stat(f"{self.directory.name}/cache").st_mode & 0o777, 0o700)
+
+        cache = relations_rest.DiskCache(self.directory.name, name="unit", size=10, ttl=5)
+        self.assertEqual(cache.path, f"{self.directory.name}/unit.sqlite")
+        self.assertEqual(cache.size, 10)
+        self.assertEqual(cache.ttl, 5)
+
+    @unittest.mock.patch("time.time")
+    def test_get(self, mock_time):
+
+        mock_time.return_value = 100
+
+        cache = relations_rest.DiskCache(self.directory.name, ttl=5)
+
+        self.assertIsNone(cache.get("unit", {"filter": {}}))
+
+        value = {"units": [{"id": 1}], "people": ["tom"]}
+        cache.set("unit", {"filter": {}}, value)
+
+        cached = cache.get("unit", {"filter": {}})
+        self.assertEqual(cached, value)
+
+        cached["units"].append({"id": 2})
+        self.assertEqual(cache.get("unit", {"filter": {}}), value)
+
+        # shared with other processes, here another cache and thread
+
+        other = relations_rest.DiskCache(self.directory.name, ttl=5)
+        self.assertEqual(other.get("unit", {"filter": {}}), value)
+
+        gotten = []
+        thread = threading.Thread(target=lambda: gotten.append(cache.get("unit", {"filter": {}})))
+        thread.start()
+        thread.join()
+        self.assertEqual(gotten, [value])
+
+        mock_time.return_value = 106
+        self.assertIsNone(cache.get("unit", {"filter": {}}))
+
+        self.assertEqual(cache.stats(), {"size": 1, "hits": 3, "misses": 2, "evictions": 0, "errors": 0})
+
+    def test_set(self):
+
+        cache = relations_rest.DiskCache(self.directory.name, size=2)
+
+        value = {"units": 1}
+        cache.set("unit", {"a": 1}, value)
+        value["units"] = 2
+        self.assertEqual(cache.get("unit", {"a": 1}), {"units": 1})
+
+        cache.set("unit", {"b": 2}, {"units": 2})
+        cache.set("unit", {"c": 3}, {"units": 3})
+
+        self.assertIsNone(cache.get("unit", {"a": 1}))
+        self.assertEqual(cache.get("unit", {"b": 2}), {"units": 2})
+        self.assertEqual(cache.get("unit", {"c": 3}), {"units": 3})
+
+        cache.set("unit", {"c": 3}, {"units": 4})
+        self.assertEqual(cache.get("unit", {"c": 3}), {"units": 4})
+
+        self.assertEqual(cache.stats(), {"size": 2, "hits": 4, "misses": 1, "evictions": 1, "errors": 0})
+
+    def test_invalidate(self):
+
+        cache = relations_rest.DiskCache(self.directory.name)
+        other = relations_rest.DiskCache(self.directory.name)
+
+        cache.set("unit", {"a": 1}, {"units": 1})
+        cache.set("unit", {"b": 2}, {"units": 2})
+        cache.set("test", {"a": 1}, {"tests": 1})
+
+        generation = cache.generation("unit")
+
+        other.invalidate("unit")
+
+        self.assertIsNone(cache.get("unit", {"a": 1}))
+        self.assertIsNone(cache.get("unit", {"b": 2}))
+        self.assertEqual(cache.get("test", {"a": 1}), {"tests": 1})
+
+        # what was fetched before another process invalidated isn't kept
+
+        self.assertEqual(cache.generation("unit"), generation + 1)
+        self.assertEqual(cache.generation("test"), 0)
+
+        cache.set("unit", {"a": 1}, {"units": 1}, generation)
+        self.assertIsNone(cache.get("unit", {"a": 1}))
+
+        cache.set("unit", {"a": 1}, {"units": 1}, generation + 1)
+        self.assertEqual(other.get("unit", {"a": 1}), {"units": 1})
+
+    def test_permissions(self):
+
+        os.chmod(self.directory.name, 0o777)
+        self.assertRaisesRegex(PermissionError, "has to be owned by and only writable by this user", relations_rest.DiskCache, self.directory.name)
+
+        os.chmod(self.directory.name, 0o755)
+        relations_rest.DiskCache(self.directory.name)
+
+    def test_titles(self):
+
+        titles = relations.Titles.__new__(relations.Titles)
+        titles.id = "id"
+        titles.fields = ["unit_id", "name"]
+        titles.ids = [2, 1]
+        titles.titles = {2: ["people", "things"], 1: ["people", "stuff"]}
+        titles.format = [None, None]
+        titles.parents = {"unit_id": relations.Titles.__new__(relations.Titles)}
+        titles.parents["unit_id"].__dict__.update(id="id", fields=["name"], ids=[1], titles={1: ["people"]}, format=[None], parents={})
+
+        cache = relations_rest.DiskCache(self.directory.name)
+        cache.set("test", {"filter": {}}, titles)
+
+        self.assertEqual(json.loads(cache.connection.execute("SELECT value FROM entries").fetchone()[0])["titles"]["titles"], [
+            [2, ["people", "things"]], [1, ["people", "stuff"]]
+        ])
+
+        cached = cache.get("test", {"filter": {}})
+        self.assertIsInstance(cached, relations.Titles)
+        self.assertEqual(list(cached), [2, 1])
+        self.assertEqual(cached[1], ["people", "stuff"])
+        self.assertEqual(cached.format, [None, None])
+        self.assertEqual(cached.parents["unit_id"].titles, {1: ["people"]})
+
+    def test_errors(self):
+
+        cache = relations_rest.DiskCache(self.directory.name)
+        cache.set("unit", {"a": 1}, {"units": 1})
+
+        # garbage is a miss
+
+        with cache.connection as connection:
+            connection.execute("UPDATE entries SET value=?", (b"nope",))
+
+        self.assertIsNone(cache.get("unit", {"a": 1}))
+
+        # as is a locked database, with sets and invalidates skipped
+
+        with unittest.mock.patch.object(
+            relations_rest.DiskCache, "connection", new_callable=unittest.mock.PropertyMock,
+            side_effect=sqlite3.OperationalError("database is locked")
+        ):
+            self.assertIsNone(cache.get("unit", {"a": 1}))
+            cache.set("unit", {"a": 1}, {"units": 1})
+            cache.invalidate("unit")
+            self.assertEqual(cache.stats(), {"size": None, "hits": 0, "misses": 2, "evictions": 0, "errors": 5})
+
+class TestCoalescer(unittest.TestCase):
+
+    def test_do(self):
+
+        coalescer = relations_rest.Coalescer()
+
+        started = threading.Event()
+        release = threading.Event()
+
+        calls = []
+
+        def call():
+            calls.append(True)
+            started.set()
+            release.wait(5)
+            return {"units": [{"id": 1}]}
+
+        results = {}
+
+        def leader():
+            results["leader"] = coalescer.do("unit", {"filter": {}}, call)
+
+        def follower(index):
+            results[index] = coalescer.do("unit", {"filter": {}}, call)
+
+        threads = [threading.Thread(target=leader)]
+        threads[0].start()
+        started.wait(5)
+
+        threads.extend(threading.Thread(target=follower, args=(index,)) for index in range(3))
+
+        for thread in threads[1:]:
+            thread.start()
+
+        while coalescer.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+
+        release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(coalescer.stats(), {"flights": 0, "sent": 1, "coalesced": 3})
+
+        self.assertEqual(results["leader"], {"units": [{"id": 1}]})
+
+        for index in range(3):
+            self.assertEqual(results[index], results["leader"])
+            self.assertIsNot(results[index], results["leader"])
+            self.assertIsNot(results[index]["units"], results[0 if index else 1]["units"])
+
+        # alone, not copied, and no longer in flight
+
+        value = {"units": []}
+        self.assertIs(coalescer.do("unit", {"filter": {}}, lambda: value), value)
+        self.assertEqual(coalescer.stats(), {"flights": 0, "sent": 2, "coalesced": 3})
+
+    def test_do_error(self):
+
+        coalescer = relations_rest.Coalescer()
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def call():
+            started.set()
+            release.wait(5)
+            raise requests.ConnectionError("down")
+
+        errors = []
+
+        def caller():
+            try:
+                coalescer.do("unit", {}, call)
+            except requests.ConnectionError as exception:
+                errors.append(exception)
+
+        threads = [threading.Thread(target=caller) for _ in range(2)]
+        threads[0].start()
+        started.wait(5)
+        threads[1].start()
+
+        while coalescer.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+
+        release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(coalescer.stats()["flights"], 0)
+
+class TestLazy(unittest.TestCase):
+
+    def test_lazy(self):
+
+        built = []
+
+        def build(match):
+            built.append(match)
+            return Unit(_read=match)
+
+        lazy = relations_rest.Lazy(build, [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}, {"id": 3, "name": "c"}])
+
+        self.assertEqual(len(lazy), 3)
+        self.assertEqual(lazy.built(), 0)
+
+        self.assertEqual(lazy[1].name, "b")
+        self.assertEqual(lazy[1].name, "b")
+        self.assertEqual(lazy.matches, [{"id": 1, "name": "a"}, None, {"id": 3, "name": "c"}])
+        self.assertEqual(lazy.built(), 1)
+        self.assertEqual(len(built), 1)
+
+        self.assertEqual([unit.name for unit in lazy[-2:]], ["b", "c"])
+        self.assertEqual(lazy.built(), 2)
+
+        lazy.append(Unit(id=4, name="d"))
+        lazy[0] = Unit(id=5, name="e")
+        self.assertEqual(lazy.built(), 4)
+        self.assertEqual(len(built), 2)
+
+        del lazy[1]
+        self.assertEqual([unit.name for unit in lazy], ["e", "c", "d"])
+
+        self.assertRaises(TypeError, lazy.__setitem__, slice(0, 1), [])
+
+class TestMetrics(unittest.TestCase):
+
+    def test___init__(self):
+
+        metrics = relations_rest.Metrics()
+        self.assertEqual(metrics.slow, 1)
+        self.assertEqual(metrics.buckets, relations_rest.Metrics.BUCKETS)
+        self.assertEqual(metrics.slowest.maxlen, 100)
+
+        metrics = relations_rest.Metrics(slow=None, buckets=[1, 2], keep=3)
+        self.assertIsNone(metrics.slow)
+        self.assertEqual(metrics.buckets, (1, 2))
+        self.assertEqual(metrics.slowest.maxlen, 3)
+
+    def test_emit(self):
+
+        metrics = relations_rest.Metrics(slow=2, buckets=[1, 2])
+
+        with self.assertLogs("relations_rest", "WARNING") as logs:
+
+            metrics.emit({"kind": "request", "endpoint": "unit", "verb": "GET", "seconds": 0.5, "path": "unit", "status": 200})
+            metrics.emit({"kind": "request", "endpoint": "unit", "verb": "GET", "seconds": 1.5, "path": "unit", "status": 200})
+            metrics.emit({"kind": "request", "endpoint": "unit", "verb": "GET", "seconds": 3, "path": "unit", "status": 503})
+            metrics.emit({"kind": "operation", "endpoint": "unit", "verb": "retrieve", "seconds": 3, "rows": 2})
+
+        self.assertEqual(logs.output, ["WARNING:relations_rest.instrument:slow request GET unit 3.000s status 503"])
+
+        self.assertEqual(metrics.histogram("request", "unit", "GET"), {"count": 3, "sum": 5, "max": 3, "buckets": [1, 1, 1]})
+        self.assertIsNone(metrics.histogram("request", "unit", "POST"))
+
+        self.assertEqual(metrics.stats(), {
+            "buckets": [1, 2],
+            "histograms": {
+                "request": {"unit": {"GET": {"count": 3, "sum": 5, "max": 3, "buckets": [1, 1, 1]}}},
+                "operation": {"unit": {"retrieve": {"count": 1, "sum": 3, "max": 3, "buckets": [0, 0, 1]}}}
+            },
+            "slow": [{"kind": "request", "endpoint": "unit", "verb": "GET", "seconds": 3, "path": "unit", "status": 503}]
+        })
+
+class TestScope(unittest.TestCase):
+
+    def test_scope(self):
+
+        scope = relations_rest.Scope()
+
+        self.assertIsNone(scope.get("unit", 1))
+
+        self.assertEqual(scope.setdefault("unit", 1, "a"), "a")
+        self.assertEqual(scope.setdefault("unit", 1, "b"), "a")
+        scope.setdefault("unit", 2, "c")
+        scope.setdefault("test", 1, "d")
+
+        self.assertEqual(scope.get("unit", 1), "a")
+
+        scope.evict("unit", 1)
+        scope.evict("unit", 3)
+        self.assertEqual(scope.models, {("unit", 2): "c", ("test", 1): "d"})
+
+        scope.evict("unit")
+        self.assertEqual(scope.models, {("test", 1): "d"})
+
+class TestCodec(unittest.TestCase):
+
+    def test___init__(self):
+
+        self.assertTrue(relations_rest.Codec().fast)
+        self.assertFalse(relations_rest.Codec(fast=False).fast)
+
+        with unittest.mock.patch("relations_rest.codec.orjson", None):
+            self.assertFalse(relations_rest.Codec().fast)
+
+    def test_dumps(self):
+
+        self.assertEqual(relations_rest.Codec().dumps({"a": [1, "b"], 2: None}), b'{"a":[1,"b"],"2":null}')
+        self.assertEqual(relations_rest.Codec(fast=False).dumps({"a": [1, "b"]}), b'{"a": [1, "b"]}')
+
+    def test_loads(self):
+
+        self.assertEqual(relations_rest.Codec().loads(b'{"a": [1, "b"]}'), {"a": [1, "b"]})
+        self.assertEqual(relations_rest.Codec(fast=False).loads(b'{"a": [1, "b"]}'), {"a": [1, "b"]})
+
+class TestCompression(unittest.TestCase):
+
+    def test___init__(self):
+
+        compression = relations_rest.Compression()
+        self.assertIsNone(compression.threshold)
+        self.assertEqual(compression.encoding, "gzip")
+        self.assertEqual(compression.accept, "gzip, deflate")
+
+        self.assertRaisesRegex(
+            ValueError, "encoding has to be one of gzip, deflate, not br",
+            relations_rest.Compression, encoding="br"
+        )
+
+    def test_compress(self):
+
+        headers = {}
+        self.assertEqual(relations_rest.Compression().compress(b"a" * 100, headers), b"a" * 100)
+        self.assertEqual(relations_rest.Compression(101).compress(b"a" * 100, headers), b"a" * 100)
+        self.assertEqual(headers, {})
+
+        self.assertEqual(gzip.decompress(relations_rest.Compression(100).compress(b"a" * 100, headers)), b"a" * 100)
+        self.assertEqual(headers, {"Content-Encoding": "gzip"})
+
+        headers = {}
+        self.assertEqual(zlib.decompress(relations_rest.Compression(100, "deflate").compress(b"a" * 100, headers)), b"a" * 100)
+        self.assertEqual(headers, {"Content-Encoding": "deflate"})
+
+class TestPool(unittest.TestCase):
+
+    def test___init__(self):
+
+        pool = relations_rest.Pool()
+        self.assertEqual(pool.connections, 10)
+        self.assertEqual(pool.maxsize, 10)
+        self.assertFalse(pool.block)
+        self.assertIsNone(pool.timeout)
+
+    def test_adapter(self):
+
+        adapter = relations_rest.Pool(connections=2, maxsize=20, block=True, timeout=(3.05, 27)).adapter()
+        self.assertIsInstance(adapter, relations_rest.Adapter)
+        self.assertEqual(adapter.timeout, (3.05, 27))
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 20)
+        self.assertTrue(adapter._pool_block)
+
+class TestRetry(unittest.TestCase):
+
+    def test___init__(self):
+
+        retry = relations_rest.Retry()
+        self.assertEqual(retry.retries, 3)
+        self.assertEqual(retry.backoff, 0.5)
+        self.assertEqual(retry.cap, 30)
+        self.assertTrue(retry.jitter)
+        self.assertEqual(retry.statuses, (429, 502, 503, 504))
+        self.assertEqual(retry.methods, ("get",))
+
+    @unittest.mock.patch("random.uniform")
+    @unittest.mock.patch("time.time")
+    def test_delay(self, mock_time, mock_uniform):
+
+        mock_uniform.side_effect = lambda low, high: high / 2
+        mock_time.return_value = 1792195200
+
+        retry = relations_rest.Retry(backoff=1, cap=5)
+
+        self.assertEqual(retry.delay(0), 0.5)
+        self.assertEqual(retry.delay(2), 2)
+        self.assertEqual(retry.delay(10), 2.5)
+
+        retry.jitter = False
+        self.assertEqual(retry.delay(2), 4)
+
+        response = unittest.mock.MagicMock()
+
+        response.headers = {}
+        self.assertEqual(retry.delay(1, response), 2)
+
+        response.headers = {"Retry-After": "3"}
+        self.assertEqual(retry.delay(1, response), 3)
+
+        response.headers = {"Retry-After": "120"}
+        self.assertEqual(retry.delay(1, response), 5)
+
+        response.headers = {"Retry-After": "Sat, 17 Oct 2026 00:00:02 GMT"}
+        self.assertEqual(retry.delay(1, response), 2)
+
+        response.headers = {"Retry-After": "Fri, 16 Oct 2026 00:00:00 GMT"}
+        self.assertEqual(retry.delay(1, response), 0)
+
+        response.headers = {"Retry-After": "1.5"}
+        self.assertEqual(retry.delay(1, response), 1.5)
+
+        response.headers = {"Retry-After": "-3"}
+        self.assertEqual(retry.delay(1, response), 0)
+
+        # garbage backs off as if not sent
+
+        for after in ["soon", "", "Sat, 99 Nope 2026"]:
+            response.headers = {"Retry-After": after}
+            self.assertEqual(retry.delay(1, response), 2)
+
+class TestBreaker(unittest.TestCase):
+
+    @unittest.mock.patch("time.monotonic")
+    def test_allow(self, mock_monotonic):
+
+        mock_monotonic.return_value = 100
+
+        breaker = relations_rest.Breaker(threshold=2, reset=10)
+
+        self.assertTrue(breaker.allow("unit"))
+        self.assertEqual(breaker.state("unit"), "closed")
+
+        breaker.failure("unit")
+        self.assertTrue(breaker.allow("unit"))
+
+        breaker.success("unit")
+        breaker.failure("unit")
+        self.assertTrue(breaker.allow("unit"))
+
+        breaker.failure("unit")
+        self.assertEqual(breaker.state("unit"), "open")
+        self.assertFalse(breaker.allow("unit"))
+        self.assertTrue(breaker.allow("test"))
+
+        mock_monotonic.return_value = 110
+        self.assertTrue(breaker.allow("unit"))
+        self.assertEqual(breaker.state("unit"), "half-open")
+        self.assertFalse(breaker.allow("unit"))
+
+        breaker.failure("unit")
+        self.assertEqual(breaker.state("unit"), "open")
+        self.assertFalse(breaker.allow("unit"))
+
+        mock_monotonic.return_value = 120
+        self.assertTrue(breaker.allow("unit"))
+
+        # a trial that never reports back only holds it half open until reset
+
+        mock_monotonic.return_value = 125
+        self.assertFalse(breaker.allow("unit"))
+
+        mock_monotonic.return_value = 130
+        self.assertTrue(breaker.allow("unit"))
+        self.assertEqual(breaker.state("unit"), "half-open")
+        self.assertFalse(breaker.allow("unit"))
+
+        breaker.success("unit")
+        self.assertEqual(breaker.state("unit"), "closed")
+        self.assertTrue(breaker.allow("unit"))
+
+        self.assertEqual(breaker.states(), {
+            "unit": {"state": "closed", "failures": 0},
+            "test": {"state": "closed", "failures": 0}
+        })
+
 class TestSource(unittest.TestCase):
 
     maxDiff = None
@@ -168,15 +862,60 @@ class TestSource(unittest.TestCase):
         relations.OneToMany(Unit, Test)
         relations.OneToOne(Test, Case)
 
-        class UnitResource(relations_restx.Resource):
+        class BulkResource(relations_restx.Resource):
+
+            @relations_restx.exceptions
+            def patch(self, id=None):
+
+                if id is not None or not isinstance(flask.request.json.get(self.PLURAL), list):
+                    return super().patch(id)
+
+                updated = 0
+
+                for values in flask.request.json[self.PLURAL]:
+                    updated += self.MODEL.one(**{self._model._id: values.pop(self._model._id)}).set(**values).update()
+
+                return {"updated": updated}, 202
+
+            @relations_restx.exceptions
+            def get(self, id=None):
+
+                response = super().get(id)
+
+                if id is None and (flask.request.json or {}).get("total") and self.PLURAL in response[0]:
+                    response[0]["total"] = self.MODEL.many(**self.criteria()).count()
+
+                if id is None and "fields" in (flask.request.json or {}) and self.PLURAL in response[0]:
+                    if isinstance(response[0][self.PLURAL], list):
+                        response[0][self.PLURAL] = [
+                            {field: record[field] for field in flask.request.json["fields"]} for record in response[0][self.PLURAL]
+                        ]
+
+                return response
+
+        class UnitResource(BulkResource):
             MODEL = Unit
 
-        class TestResource(relations_restx.Resource):
+        class TestResource(BulkResource):
             MODEL = Test
 
         class CaseResource(relations_restx.Resource):
             MODEL = Case
 
+        class BatchResource(flask_restx.Resource):
+
+            def post(self):
+
+                client = flask.current_app.test_client()
+
+                responses = []
+
+                for request in flask.request.json["requests"]:
+                    response = client.open(f"/{request['path']}", method=request["method"], json=request["body"])
+                    responses.append({"status": response.status_code, "body": response.json})
+
+                return {"responses": responses}
+
         self.resource = relations.unittest.MockSource("RestXResource")
 
         self.app = flask.Flask("source-api")
@@ -192,16 +931,9 @@ class TestSource(unittest.TestCase):
         restx.add_resource(TestResource, '/test', '/test/<id>')
         restx.add_resource(CaseResource, '/case', '/case/<id>')
 
-        self.source = relations_rest.Source("RestSource", "", self.app.test_client())
-
-        def result(model, key, response):
-
-            if key in response.json:
-                return response.json[key]
+        restx.add_resource(BatchResource, '/batch')
 
-            print(response.json)
-
-        self.source.result = result
+        self.source = relations_rest.Source("RestSource", "", Session(self.app.test_client()))
 
     @unittest.mock.patch("relations.SOURCES", {})
     @unittest.mock.patch("requests.Session")
@@ -211,28 +943,268 @@ class TestSource(unittest.TestCase):
         self.assertEqual(source.name, "unit")
         self.assertEqual(source.url, "http://test.com")
         self.assertEqual(source.session.a, 1)
+        self.assertEqual(source.workers, 4)
+        self.assertIsNone(source.chunk)
+        self.assertFalse(source.bulk)
+        self.assertIsInstance(source.pool, relations_rest.Pool)
+        self.assertIsInstance(source.compression, relations_rest.Compression)
+        self.assertEqual(source.options, {"a": 1})
         self.assertEqual(relations.SOURCES["unit"], source)
 
-        source = relations_rest.Source("test", "http://unit.com", session="sesh")
+        source = relations_rest.Source("test", "http://unit.com", session="sesh", workers=2, chunk=10, bulk=True)
         self.assertEqual(source.name, "test")
         self.assertEqual(source.url, "http://unit.com")
         self.assertEqual(source.session, "sesh")
+        self.assertEqual(source.workers, 2)
+        self.assertEqual(source.chunk, 10)
+        self.assertTrue(source.bulk)
         self.assertEqual(relations.SOURCES["test"], source)
 
+        self.assertRaises(TypeError, relations_rest.Source, "test", "http://unit.com", "sesh", 2)
+
     @unittest.mock.patch("relations.SOURCES", {})
-    def test_result(self):
+    def test_session(self):
 
-        source = relations_rest.Source("test", "http://unit.com", session="sesh")
+        source = relations_rest.Source("unit", "http://test.com")
 
-        model = unittest.mock.MagicMock()
-        model.NAME = "moded"
-        model.overflow = False
+        session = source.session
+        self.assertIsInstance(session, requests.Session)
+        self.assertIs(source.session, session)
+
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(source.session))
+        thread.start()
+        thread.join()
+
+        self.assertIsInstance(sessions[0], requests.Session)
+        self.assertIsNot(sessions[0], session)
+
+        source.session = "sesh"
+        self.assertEqual(source.session, "sesh")
+
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(source.session))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(sessions, ["sesh"])
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_connect(self):
+
+        source = relations_rest.Source(
+            "unit", "http://test.com", pool=relations_rest.Pool(connections=2, maxsize=20, block=True, timeout=(3.05, 27)), headers={"a": "b"}
+        )
+
+        session = source.connect()
+
+        self.assertEqual(session.headers, {"a": "b", "Accept-Encoding": "gzip, deflate"})
+        self.assertEqual(source.options["headers"], {"a": "b"})
+        self.assertEqual(relations_rest.Source("unit", "http://test.com").connect().headers["Accept-Encoding"], "gzip, deflate")
+        self.assertEqual(relations_rest.Source(
+            "unit", "http://test.com", compression=relations_rest.Compression(accept="gzip")
+        ).connect().headers["Accept-Encoding"], "gzip")
+        self.assertEqual(relations_rest.Source(
+            "unit", "http://test.com", headers={"accept-encoding": "br"}
+        ).connect().headers["Accept-Encoding"], "br")
+
+        passed = requests.Session()
+        passed.headers["Accept-Encoding"] = "br"
+        relations_rest.Source("unit", "http://test.com", session=passed, compression=relations_rest.Compression(accept="gzip"))
+        self.assertEqual(passed.headers["Accept-Encoding"], "br")
+
+        del passed.headers["Accept-Encoding"]
+        relations_rest.Source("unit", "http://test.com", session=passed, compression=relations_rest.Compression(accept="gzip"))
+        self.assertEqual(passed.headers["Accept-Encoding"], "gzip")
+
+        for url in ["http://test.com", "https://test.com"]:
+            adapter = session.get_adapter(url)
+            self.assertIsInstance(adapter, relations_rest.Adapter)
+            self.assertEqual(adapter.timeout, (3.05, 27))
+            self.assertEqual(adapter._pool_connections, 2)
+            self.assertEqual(adapter._pool_maxsize, 20)
+            self.assertTrue(adapter._pool_block)
+
+    @unittest.mock.patch("requests.adapters.HTTPAdapter.send")
+    def test_adapter(self, mock_send):
+
+        adapter = relations_rest.Adapter(timeout=5, pool_maxsize=3)
+        self.assertEqual(adapter.timeout, 5)
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+        adapter.send("request", stream=True)
+        mock_send.assert_called_once_with("request", timeout=5, stream=True)
+
+        adapter.send("request", timeout=1)
+        mock_send.assert_called_with("request", timeout=1)
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_executor(self):
+
+        source = relations_rest.Source("unit", "http://test.com", workers=3)
+
+        executor = source.executor
+        self.assertEqual(executor._max_workers, 3)
+        self.assertIs(source.executor, executor)
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    @unittest.mock.patch("requests.Session")
+    def test_close(self, mock_session):
+
+        source = relations_rest.Source("unit", "http://test.com", workers=2)
+
+        source.close()
+
+        session = source.session
+        executor = source.executor
+        self.assertEqual(source.gather(lambda item: item, [1, 2]), [1, 2])
+
+        source.close()
+
+        self.assertTrue(executor._shutdown)
+        session.close.assert_called_once_with()
+        self.assertIsNot(source.executor, executor)
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_gather(self):
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh", workers=2)
+
+        self.assertEqual(source.gather(lambda item: item * 2, []), [])
+        self.assertEqual(source.gather(lambda item: item * 2, [1]), [2])
+        self.assertEqual(source.gather(lambda item: item * 2, [1, 2, 3]), [2, 4, 6])
+
+        called = []
+
+        def fail(item):
+            called.append(item)
+            if item == 1:
+                raise Exception(f"failed {item}")
+            return item
+
+        self.assertRaisesRegex(Exception, "failed 1", source.gather, fail, [1, 2, 3, 4, 5])
+        self.assertEqual(sorted(called), [1, 2, 3, 4, 5])
+
+        threads = source.gather(lambda item: threading.current_thread().name, [1, 2])
+        self.assertTrue(all(thread.startswith("relations-rest-test") for thread in threads))
+
+        nested = source.gather(lambda item: source.gather(lambda inner: threading.current_thread().name, [item, item]), [1, 2])
+        self.assertEqual([len(set(names)) for names in nested], [1, 1])
+
+        # another source's workers, even with a name starting the same, still gather across this pool
+
+        other = relations_rest.Source("testing", "http://unit.com", session="sesh", workers=2)
+
+        nested = other.gather(lambda item: source.gather(lambda inner: threading.current_thread().name, [item, item]), [1, 2])
+        self.assertTrue(all(name.startswith("relations-rest-test_") for names in nested for name in names))
+
+        other.close()
+        source.close()
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_chunks(self):
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh")
+
+        self.assertEqual(source.chunks([]), [])
+        self.assertEqual(source.chunks([1, 2, 3]), [[1, 2, 3]])
+
+        source.chunk = 2
+
+        self.assertEqual(source.chunks([]), [])
+        self.assertEqual(source.chunks([1, 2, 3]), [[1, 2], [3]])
+        self.assertEqual(source.chunks([1, 2, 3, 4]), [[1, 2], [3, 4]])
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_decode(self):
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh")
+
+        model = unittest.mock.MagicMock()
+        model.NAME = "moded"
+
+        response = unittest.mock.MagicMock()
+        response.status_code = 200
+        response.content = json.dumps({"name": "value"}).encode()
+
+        self.assertEqual(source.decode(model, response), {"name": "value"})
+
+        response = unittest.mock.MagicMock()
+        response.status_code = 500
+        response.content = json.dumps({"message": "whoops"}).encode()
+
+        self.assertRaisesRegex(relations.ModelError, "moded: whoops", source.decode, model, response)
+
+        response.content = json.dumps(["whoops"]).encode()
+
+        self.assertRaisesRegex(relations.ModelError, "moded: API Error", source.decode, model, response)
+
+        response = unittest.mock.MagicMock()
+        response.status_code = 502
+        response.content = b"<html>Bad Gateway</html>"
+
+        self.assertRaisesRegex(relations.ModelError, "moded: API Error 502", source.decode, model, response)
+
+        response.status_code = 200
+
+        self.assertRaises(ValueError, source.decode, model, response)
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_encode(self):
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh", compression=relations_rest.Compression(20))
+
+        self.assertEqual(source.encode({"a": 1}), {"data": b'{"a":1}', "headers": {"Content-Type": "application/json"}})
+
+        body = {"units": [{"name": "people"}, {"name": "stuff"}]}
+
+        encoded = source.encode(body)
+        self.assertEqual(encoded["headers"], {"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        self.assertEqual(json.loads(gzip.decompress(encoded["data"])), body)
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh", compression=relations_rest.Compression(20, "deflate"))
+
+        encoded = source.encode(body)
+        self.assertEqual(encoded["headers"], {"Content-Type": "application/json", "Content-Encoding": "deflate"})
+        self.assertEqual(json.loads(zlib.decompress(encoded["data"])), body)
+
+        session = unittest.mock.MagicMock()
+        session.post.return_value.status_code = 200
+        session.post.return_value.content = b'{"units": [{"id": 1}, {"id": 2}]}'
+
+        source.session = session
+
+        self.assertEqual(source.send(Unit(), "units", "post", "unit", body), [{"id": 1}, {"id": 2}])
+        session.post.assert_called_once_with("http://unit.com/unit", **encoded)
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_unpack(self):
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh")
+
+        model = unittest.mock.MagicMock()
+        model.overflow = False
+
+        self.assertEqual(source.unpack(model, "name", {"name": "value"}), "value")
+        self.assertFalse(model.overflow)
+
+        self.assertEqual(source.unpack(model, "name", {"name": "value", "overflow": True}), "value")
+        self.assertTrue(model.overflow)
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_result(self):
+
+        source = relations_rest.Source("test", "http://unit.com", session="sesh")
+
+        model = unittest.mock.MagicMock()
+        model.NAME = "moded"
+        model.overflow = False
 
         # good
 
         response = unittest.mock.MagicMock()
         response.status_code = 200
-        response.json.return_value = {"name": "value", "overflow": True}
+        response.content = json.dumps({"name": "value", "overflow": True}).encode()
 
         self.assertEqual(source.result(model, "name", response), "value")
         self.assertTrue(model.overflow)
@@ -241,10 +1213,407 @@ class TestSource(unittest.TestCase):
 
         response = unittest.mock.MagicMock()
         response.status_code = 500
-        response.json.return_value = {"message": "whoops"}
+        response.content = json.dumps({"message": "whoops"}).encode()
 
         self.assertRaisesRegex(relations.ModelError, "moded: whoops", source.result, model, "whatevs", response)
 
+    @unittest.mock.patch("time.sleep")
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_request(self, mock_sleep):
+
+        session = unittest.mock.MagicMock()
+        source = relations_rest.Source("RestSource", "http://unit.com", session=session)
+
+        good = unittest.mock.MagicMock()
+        good.status_code = 200
+        good.content = json.dumps({"count": 1}).encode()
+
+        busy = unittest.mock.MagicMock()
+        busy.status_code = 503
+        busy.headers = {"Retry-After": "2"}
+        busy.content = json.dumps({"message": "busy"}).encode()
+
+        # no retry
+
+        session.get.side_effect = [busy]
+        self.assertEqual(source.request(Unit.many(), "get", "unit", json={}), busy)
+        session.get.assert_called_once_with("http://unit.com/unit", json={})
+
+        # retried
+
+        source.retry = relations_rest.Retry(retries=2)
+
+        session.get.reset_mock()
+        session.get.side_effect = [busy, requests.ConnectionError("down"), good]
+        self.assertEqual(source.request(Unit.many(), "get", "unit", json={}), good)
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(mock_sleep.call_args_list[0], unittest.mock.call(2))
+
+        # out of retries
+
+        session.get.reset_mock()
+        session.get.side_effect = [busy, busy, busy]
+        self.assertRaisesRegex(relations.ModelError, "unit: busy", source.get, Unit.many(), {"filter": {}})
+        self.assertEqual(session.get.call_count, 3)
+
+        session.get.reset_mock()
+        session.get.side_effect = requests.ConnectionError("down")
+        self.assertRaises(requests.ConnectionError, source.request, Unit.many(), "get", "unit")
+        self.assertEqual(session.get.call_count, 3)
+
+        # only retries what's allowed
+
+        session.post.side_effect = [busy]
+        self.assertEqual(source.request(Unit.many(), "post", "unit", json={}), busy)
+        session.post.assert_called_once()
+
+        # breaker
+
+        source.retry = None
+        source.breaker = relations_rest.Breaker(threshold=2)
+
+        session.get.reset_mock()
+        session.get.side_effect = [busy, busy, good]
+        source.request(Unit.many(), "get", "unit")
+        source.request(Unit.many(), "get", "unit")
+        self.assertEqual(source.breaker.state("unit"), "open")
+
+        self.assertRaisesRegex(relations.ModelError, "unit: circuit open for unit", source.request, Unit.many(), "get", "unit")
+        self.assertEqual(session.get.call_count, 2)
+
+        source.request(Test.many(), "get", "test")
+        self.assertEqual(source.breaker.state("test"), "closed")
+
+        # whatever's raised is a failure, and what's done after the outcome doesn't keep it from being recorded
+
+        session.get.reset_mock()
+        session.get.side_effect = [ValueError("urllib3"), ValueError("urllib3")]
+        self.assertRaisesRegex(ValueError, "urllib3", source.request, Case.many(), "get", "case")
+        self.assertRaisesRegex(ValueError, "urllib3", source.request, Case.many(), "get", "case")
+        self.assertEqual(source.breaker.state("case"), "open")
+
+        source.breaker = relations_rest.Breaker(threshold=1)
+        source.breaker.failure("case")
+        source.breaker.circuits["case"]["opened"] -= source.breaker.reset
+
+        source.instrument = unittest.mock.MagicMock()
+        source.instrument.emit.side_effect = RuntimeError("emit")
+
+        session.get.side_effect = [good]
+        self.assertRaisesRegex(RuntimeError, "emit", source.request, Case.many(), "get", "case")
+        self.assertEqual(source.breaker.state("case"), "closed")
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_get(self):
+
+        session = unittest.mock.MagicMock()
+        source = relations_rest.Source("RestSource", "http://unit.com", session=session)
+
+        fresh = unittest.mock.MagicMock()
+        fresh.status_code = 200
+        fresh.headers = {"ETag": '"v1"', "Last-Modified": "Sat, 17 Oct 2026 00:00:00 GMT"}
+        fresh.content = json.dumps({"units": [{"id": 1, "name": "people"}]}).encode()
+
+        unchanged = unittest.mock.MagicMock()
+        unchanged.status_code = 304
+        unchanged.headers = {}
+
+        # not conditional
+
+        session.get.return_value = fresh
+
+        self.assertEqual(source.get(Unit.many(), {"filter": {}}), {"units": [{"id": 1, "name": "people"}]})
+        session.get.assert_called_once_with("http://unit.com/unit", json={"filter": {}})
+
+        # first time around
+
+        source.conditional = relations_rest.Cache()
+        session.get.reset_mock()
+
+        self.assertEqual(source.get(Unit.many(), {"filter": {}}), {"units": [{"id": 1, "name": "people"}]})
+        session.get.assert_called_once_with("http://unit.com/unit", json={"filter": {}}, headers={})
+
+        # unchanged
+
+        session.get.return_value = unchanged
+        source.codec = unittest.mock.MagicMock(wraps=source.codec)
+
+        self.assertEqual(Unit.many().name, ["people"])
+        session.get.assert_called_with("http://unit.com/unit", json={"filter": {}}, headers={
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Sat, 17 Oct 2026 00:00:00 GMT"
+        })
+        source.codec.loads.assert_not_called()
+
+        # changed, only etag
+
+        fresh.headers = {"ETag": '"v2"'}
+        fresh.content = json.dumps({"units": [{"id": 1, "name": "stuff"}]}).encode()
+        session.get.return_value = fresh
+
+        self.assertEqual(Unit.many().name, ["stuff"])
+
+        session.get.return_value = unchanged
+
+        self.assertEqual(Unit.many().name, ["stuff"])
+        session.get.assert_called_with("http://unit.com/unit", json={"filter": {}}, headers={"If-None-Match": '"v2"'})
+
+        # no validators, nothing kept
+
+        fresh.headers = {}
+        session.get.return_value = fresh
+
+        self.assertEqual(source.get(Unit.many(), {"filter": {"name": "stuff"}}), {"units": [{"id": 1, "name": "stuff"}]})
+        self.assertIsNone(source.conditional.get("http://unit.com/unit", {"filter": {"name": "stuff"}}))
+
+    def test_fetch(self):
+
+        Unit([["people"], ["stuff"]]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertEqual(self.source.fetch(Unit.many(), {"filter": {}, "count": True}), 2)
+        self.assertEqual(self.source.session.get.call_count, 1)
+
+        self.source.cache = relations_rest.Cache()
+
+        self.assertEqual(Unit.many().count(), 2)
+        self.assertEqual(Unit.many().count(), 2)
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+        self.assertEqual(self.source.session.get.call_count, 3)
+
+        model = Unit.many().limit(1).retrieve()
+        self.assertTrue(model.overflow)
+        model = Unit.many().limit(1).retrieve()
+        self.assertTrue(model.overflow)
+        self.assertEqual(self.source.session.get.call_count, 4)
+
+        self.assertEqual(self.source.cache.stats(), {"size": 3, "hits": 3, "misses": 3, "evictions": 0})
+
+        Unit.many().retrieve()[0].name = "changed"
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+
+        self.assertRaisesRegex(relations.ModelError, "unit: .*nope", self.source.fetch, Unit.many(), {"filter": {"nope": 1}})
+        self.assertEqual(self.source.cache.stats()["size"], 3)
+
+        # shared with a source for another API, neither gets or invalidates what's the other's
+
+        response = unittest.mock.MagicMock(status_code=200, headers={})
+        response.content = json.dumps({"units": 5}).encode()
+
+        other = relations_rest.Source("OtherSource", "http://other-api", session=unittest.mock.MagicMock(), cache=self.source.cache)
+        other.session.get.return_value = response
+
+        self.assertEqual(other.fetch(Unit.many(), {"filter": {}, "count": True}), 5)
+        self.assertEqual(Unit.many().count(), 2)
+
+        other.invalidate("unit")
+
+        self.assertEqual(Unit.many().count(), 2)
+        self.assertEqual(self.source.session.get.call_count, 5)
+
+        # what's invalidated while being fetched isn't kept
+
+        get = self.source.session.get
+
+        def changing(url, **kwargs):
+            response = get(url, **kwargs)
+            self.source.session.get.side_effect = get
+            Unit.one(1).set(name="persons").update()
+            return response
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+        self.source.session.get.side_effect = changing
+
+        self.assertEqual(Unit.many(name="people").count(), 1)
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertEqual(Unit.many(name="people").count(), 0)
+        self.assertEqual(self.source.session.get.call_count, 1)
+
+    def test_disk_cache(self):
+
+        Unit([["people"], ["stuff"]]).create()
+        Test(1, "things").create()
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.source.cache = relations_rest.DiskCache(directory.name)
+        self.source.titles_cache = relations_rest.DiskCache(directory.name, name="titles")
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+        self.assertEqual(Test.many().titles().titles, {1: ["people", "things"]})
+        self.assertEqual(self.source.session.get.call_count, 3)
+
+        # another worker starts warm
+
+        worker = relations_rest.DiskCache(directory.name)
+        worker_titles = relations_rest.DiskCache(directory.name, name="titles")
+
+        cache, titles_cache = self.source.cache, self.source.titles_cache
+        self.source.cache, self.source.titles_cache = worker, worker_titles
+
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+        self.assertEqual(Test.many().titles().titles, {1: ["people", "things"]})
+        self.assertEqual(self.source.session.get.call_count, 3)
+
+        # and what it writes is invalidated for everyone
+
+        Unit.one(1).set(name="persons").update()
+
+        self.source.cache, self.source.titles_cache = cache, titles_cache
+
+        self.assertIsNone(cache.get("/unit", {"filter": {}}))
+        self.assertEqual(titles_cache.stats()["size"], 0)
+        self.assertEqual(Unit.many().name, ["persons", "stuff"])
+        self.assertEqual(Test.many().titles().titles, {1: ["persons", "things"]})
+        self.assertEqual(self.source.session.get.call_count, 6)
+
+    def test_coalesced(self):
+
+        Unit([["people"], ["stuff"]]).create()
+
+        self.source.coalesce = relations_rest.Coalescer()
+
+        get = self.source.session.get
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow(url, **kwargs):
+            started.set()
+            release.wait(5)
+            return get(url, **kwargs)
+
+        self.source.session.get.side_effect = slow
+
+        results = []
+
+        def retrieve():
+            results.append(Unit.many().retrieve())
+
+        threads = [threading.Thread(target=retrieve) for _ in range(3)]
+        threads[0].start()
+        started.wait(5)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        while self.source.coalesce.stats()["coalesced"] < 2:
+            time.sleep(0.001)
+
+        release.set()
+
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.source.session.get.call_count, 1)
+        self.assertEqual([units.name for units in results], [["people", "stuff"]] * 3)
+
+        results[0][0].name = "changed"
+        self.assertEqual(results[1][0].name, "people")
+        self.assertIsNot(results[1][0], results[2][0])
+
+    def test_send(self):
+
+        self.source.cache = relations_rest.Cache()
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertEqual(Unit.many().count(), 0)
+        self.assertEqual(Test.many().count(), 0)
+
+        self.assertEqual(self.source.send(Unit(), "units", "post", "unit", {"units": [{"name": "people"}]}), [{"id": 1, "name": "people"}])
+        self.source.session.post.assert_called_once_with("/unit", **self.source.encode({"units": [{"name": "people"}]}))
+
+        self.assertEqual(Unit.many().count(), 1)
+        self.assertEqual(Test.many().count(), 0)
+        self.assertEqual(self.source.session.get.call_count, 3)
+
+        Unit.one(1).set(name="stuff").update()
+        self.assertEqual(Unit.many(name="stuff").count(), 1)
+
+        Unit.many().delete()
+        self.assertEqual(Unit.many().count(), 0)
+
+        self.assertRaisesRegex(relations.ModelError, "unit: either unit or units required", self.source.send, Unit(), "units", "post", "unit", {})
+        self.assertEqual(self.source.cache.stats()["size"], 1)
+
+    def test_instrument(self):
+
+        self.source.instrument = unittest.mock.MagicMock()
+
+        Unit([["people"], ["stuff"]]).create()
+
+        events = [call.args[0] for call in self.source.instrument.emit.call_args_list]
+
+        self.assertEqual([(event["kind"], event["endpoint"], event["verb"]) for event in events], [
+            ("request", "unit", "POST"),
+            ("decode", "unit", "JSON"),
+            ("operation", "unit", "create")
+        ])
+
+        self.assertEqual(events[0]["path"], "unit")
+        self.assertEqual(events[0]["status"], 201)
+        self.assertEqual(events[0]["attempt"], 0)
+        self.assertEqual(events[0]["sent"], len(self.source.encode({"units": [{"name": "people"}, {"name": "stuff"}]})["data"]))
+        self.assertGreater(events[0]["received"], 0)
+        self.assertEqual(events[2]["rows"], 2)
+        self.assertIsNone(events[2]["error"])
+
+        for event in events:
+            self.assertGreaterEqual(event["seconds"], 0)
+
+        # streams once they're gone through, with the rows streamed
+
+        self.source.instrument = unittest.mock.MagicMock()
+
+        units = Unit.many().retrieve(stream=1)
+        self.source.instrument.emit.assert_not_called()
+
+        self.assertEqual([unit.name for unit in units], ["people", "stuff"])
+
+        event = self.source.instrument.emit.call_args.args[0]
+        self.assertEqual((event["kind"], event["verb"], event["rows"]), ("operation", "retrieve", 2))
+        self.assertIsNone(event["error"])
+
+        units = Unit.many().retrieve(stream=1)
+        next(units)
+        units.close()
+
+        event = self.source.instrument.emit.call_args.args[0]
+        self.assertEqual((event["kind"], event["verb"], event["rows"]), ("operation", "retrieve", 1))
+
+        self.source.instrument = relations_rest.Metrics()
+
+        self.assertEqual(Unit.many().count(), 2)
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+        self.assertEqual(len(Unit.many().titles()), 2)
+        Unit.many().set(name="same").update()
+        Unit.many().delete()
+
+        self.assertRaisesRegex(relations.ModelError, "unit: none retrieved", Unit.one(name="nope").retrieve)
+
+        histograms = self.source.instrument.stats()["histograms"]
+
+        self.assertEqual({verb: histogram["count"] for verb, histogram in histograms["request"]["unit"].items()}, {
+            "GET": 4, "PATCH": 1, "DELETE": 1
+        })
+        self.assertEqual({verb: histogram["count"] for verb, histogram in histograms["operation"]["unit"].items()}, {
+            "count": 1, "retrieve": 3, "titles": 1, "update": 1, "delete": 1
+        })
+        self.assertEqual(histograms["build"]["unit"]["MODELS"]["count"], 2)
+        self.assertEqual(histograms["decode"]["unit"]["JSON"]["count"], 6)
+
+        self.source.instrument = unittest.mock.MagicMock()
+        self.assertRaises(relations.ModelError, Unit.one(name="nope").retrieve)
+        self.assertEqual(self.source.instrument.emit.call_args.args[0]["error"], "unit: none retrieved")
+        self.assertIsNone(self.source.instrument.emit.call_args.args[0]["rows"])
+
     def test_init(self):
 
         class Check(relations.Model):
@@ -257,25 +1626,1371 @@ class TestSource(unittest.TestCase):
         self.assertEqual(model.SINGULAR, "check")
         self.assertEqual(model.PLURAL, "checks")
         self.assertEqual(model.ENDPOINT, "check")
+        self.assertIsNone(model._total)
         self.assertTrue(model._fields._names["id"].auto)
 
         Check.SINGULAR = "people"
         Check.PLURAL = "stuff"
         Check.ENDPOINT = "things"
 
-        model = Check()
-        self.source.init(model)
+        model = Check()
+        self.source.init(model)
+
+        self.assertEqual(model.SINGULAR, "people")
+        self.assertEqual(model.PLURAL, "stuff")
+        self.assertEqual(model.ENDPOINT, "things")
+
+    def test_create(self):
+
+        simple = Simple("sure")
+        simple.plain.add("fine")
+
+        simple.create()
+
+        self.assertEqual(simple.id, 1)
+        self.assertEqual(simple._action, "update")
+        self.assertEqual(simple._record._action, "update")
+        self.assertEqual(simple.plain[0].simple_id, 1)
+        self.assertEqual(simple.plain._action, "update")
+        self.assertEqual(simple.plain[0]._record._action, "update")
+
+        simples = Simple.bulk().add("ya").create()
+
+        self.assertEqual(simples._models, [])
+
+        yep = Meta("yep", True, 3.50, {"tom", "mary"}, [1, None], {"a": 1, "for": [{"1": "yep"}]}, "sure").create()
+        self.assertTrue(Meta.one(yep.id).flag)
+
+        nope = Meta("nope", False).create()
+        self.assertFalse(Meta.one(nope.id).flag)
+
+        self.assertEqual(self.resource.ids, {
+            "simple": 2,
+            "plain": 1,
+            "meta": 2
+        })
+
+        self.assertEqual(self.resource.data, {
+            "simple": {
+                1: {
+                    "id": 1,
+                    "name": "sure"
+                },
+                2: {
+                    "id": 2,
+                    "name": "ya"
+                }
+            },
+            "plain": {
+                1: {
+                    "simple_id": 1,
+                    "name": "fine"
+                }
+            },
+            "meta": {
+                1: {
+                    "id": 1,
+                    "name": "yep",
+                    "flag": True,
+                    "spend": 3.50,
+                    "people": ["mary", "tom"],
+                    "stuff": [1, {"relations.io": {"1": "sure"}}],
+                    "things": {"a": 1, "for": [{"1": "yep"}]},
+                    "things__for__0____1": "yep"
+                },
+                2: {
+                    "id": 2,
+                    "name": "nope",
+                    "flag": False,
+                    "spend": None,
+                    "people": [],
+                    "stuff": [{"relations.io": {"1": None}}],
+                    "things": {},
+                    "things__for__0____1": None
+                }
+            }
+        })
+
+    def test_create_chunk(self):
+
+        self.source.chunk = 2
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit([["a"], ["b"], ["c"], ["d"], ["e"]]).create()
+
+        # Chunks are sent in parallel, so which gets which ids depends on which lands first
+
+        self.assertEqual(sorted(units.id), [1, 2, 3, 4, 5])
+        self.assertEqual(units.name, ["a", "b", "c", "d", "e"])
+        self.assertEqual(self.source.session.post.call_count, 3)
+        self.assertEqual({unit.id: unit.name for unit in Unit.many()}, dict(zip(units.id, units.name)))
+
+        post = self.source.session.post
+
+        def fail(url, data, headers):
+
+            if any(record["name"] == "bad" for record in json.loads(data)["simples"]):
+                return post(url, json={})
+
+            return post(url, data=data, headers=headers)
+
+        self.source.session = unittest.mock.MagicMock()
+        self.source.session.post.side_effect = fail
+
+        simples = Simple([["f"], ["g"], ["bad"], ["h"], ["i"]])
+
+        self.assertRaisesRegex(relations.ModelError, "simple: either simple or simples required, created 3 of 5", simples.create)
+
+        self.assertEqual([simple._action for simple in simples], ["update", "update", "create", "create", "update"])
+        self.assertEqual(simples.id[2:4], [None, None])
+        self.assertEqual(sorted(simples.id[:2] + simples.id[4:]), [1, 2, 3])
+        self.assertEqual({id: record["name"] for id, record in self.resource.data["simple"].items()}, {
+            simple.id: simple.name for simple in simples if simple.id is not None
+        })
+
+        simples[2].name = "j"
+        simples.create()
+
+        self.assertEqual(simples.id[2:4], [4, 5])
+        self.assertEqual(sorted(simples.id), [1, 2, 3, 4, 5])
+        self.assertEqual(simples._action, "update")
+
+        simples = Simple.bulk().add("k").add("bad").add("l")
+
+        self.assertRaisesRegex(relations.ModelError, "created 1 of 3", simples.create)
+        self.assertEqual(simples.name, ["k", "bad"])
+
+        # An error page that isn't JSON fails just its chunk
+
+        def gateway(url, data, headers):
+
+            if any(record["name"] == "bad" for record in json.loads(data)["simples"]):
+                response = unittest.mock.MagicMock(status_code=502, headers={})
+                response.content = b"<html>Bad Gateway</html>"
+                return response
+
+            return post(url, data=data, headers=headers)
+
+        self.source.session.post.side_effect = gateway
+
+        simples = Simple([["m"], ["n"], ["bad"], ["o"]])
+
+        self.assertRaisesRegex(relations.ModelError, "simple: API Error 502, created 2 of 4", simples.create)
+
+        self.assertEqual([simple._action for simple in simples], ["update", "update", "create", "create"])
+        self.assertEqual(sorted(simples.id[:2]), [7, 8])
+        self.assertEqual(simples.id[2:], [None, None])
+
+        self.source.chunk = None
+        self.assertEqual(Simple.bulk().create()._models, [])
+
+    def test_create_children(self):
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit([["people"], ["stuff"], ["things"]])
+
+        units[0].test.add("a").add("b")
+        units[2].test.add("c")
+        units[0].test[1].case.add("x")
+        units[2].test[0].case.add("y")
+
+        units.create()
+
+        self.assertEqual([call.args[0] for call in self.source.session.post.call_args_list], ["/unit", "/test", "/case"])
+        self.source.session.get.assert_not_called()
+
+        self.assertEqual(units[0].test.id, [1, 2])
+        self.assertEqual(units[0].test.unit_id, [1, 1])
+        self.assertEqual(units[2].test.id, [3])
+        self.assertEqual(units[2].test.unit_id, [3])
+        self.assertEqual(units[0].test[1].case.test_id, 2)
+        self.assertEqual(units[2].test[0].case.test_id, 3)
+
+        self.assertEqual(units[0].test._action, "update")
+        self.assertEqual(units[0].test[0]._action, "update")
+        self.assertEqual(units[0].test[1].case._action, "update")
+
+        self.assertEqual(self.resource.data["test"], {
+            1: {"id": 1, "unit_id": 1, "name": "a"},
+            2: {"id": 2, "unit_id": 1, "name": "b"},
+            3: {"id": 3, "unit_id": 3, "name": "c"}
+        })
+        self.assertEqual(self.resource.data["case"], {
+            1: {"id": 1, "test_id": 2, "name": "x"},
+            2: {"id": 2, "test_id": 3, "name": "y"}
+        })
+
+    def test_update_children(self):
+
+        units = Unit([["people"], ["stuff"]])
+        units[0].test.add("a")
+        units[1].test.add("b")
+        units.create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit.many().retrieve()
+
+        for unit in units:
+            unit.test.retrieve()
+
+        units[0].test[0].name = "aa"
+        units[0].test.add("c")
+        units[1].test.add("d")
+
+        self.assertEqual(units.update(), 2)
+
+        self.assertEqual(self.source.session.post.call_count, 1)
+        self.source.session.post.assert_called_once_with("/test", **self.source.encode({"tests": [
+            {"unit_id": 1, "name": "c"},
+            {"unit_id": 2, "name": "d"}
+        ]}))
+        self.source.session.patch.assert_any_call("/test/1", **self.source.encode({"test": {"name": "aa"}}))
+        self.assertEqual([call.args[0] for call in self.source.session.patch.call_args_list], ["/unit/1", "/unit/2", "/test/1", "/test/2"])
+
+        self.assertEqual(units[0].test.id, [1, 3])
+        self.assertEqual(units[1].test.id, [2, 4])
+        self.assertEqual(Test.many().name, ["aa", "c", "b", "d"])
+
+    def test_count(self):
+
+        Unit([["stuff"], ["people"]]).create()
+
+        self.assertEqual(Unit.many().count(), 2)
+
+        self.assertEqual(Unit.many(name="people").count(), 1)
+
+        self.assertEqual(Unit.many(like="p").count(), 1)
+
+    def test_retrieve(self):
+
+        Unit([["people"], ["stuff"]]).create()
+
+        models = Unit.one(name__in=["people", "stuff"])
+        self.assertRaisesRegex(relations.ModelError, "unit: more than one retrieved", models.retrieve)
+
+        model = Unit.one(name="things")
+        self.assertRaisesRegex(relations.ModelError, "unit: none retrieved", model.retrieve)
+
+        self.assertIsNone(model.retrieve(False))
+
+        unit = Unit.one(name="people")
+
+        self.assertEqual(unit.id, 1)
+        self.assertEqual(unit._action, "update")
+        self.assertEqual(unit._record._action, "update")
+
+        unit = Unit.one(like="p")
+
+        self.assertEqual(unit.id, 1)
+        self.assertEqual(unit._action, "update")
+        self.assertEqual(unit._record._action, "update")
+
+        unit.test.add("things")[0].case.add("persons")
+        unit.update()
+
+        Meta("yep", True, 1.1, {"tom"}, [1, None], {"a": 1}).create()
+        model = Meta.one(name="yep")
+
+        self.assertEqual(model.flag, True)
+        self.assertEqual(model.spend, 1.1)
+        self.assertEqual(model.people, {"tom"})
+        self.assertEqual(model.stuff, [1, {"relations.io": {"1": None}}])
+        self.assertEqual(model.things, {"a": 1})
+
+        self.assertEqual(Unit.many().name, ["people", "stuff"])
+        self.assertEqual(Unit.many().sort("-name").name, ["stuff", "people"])
+        self.assertEqual(Unit.many().sort("-name").limit(1, 1).name, ["people"])
+        self.assertEqual(Unit.many().sort("-name").limit(0).name, [])
+        self.assertEqual(Unit.many(name="people").limit(1).name, ["people"])
+
+        Meta("dive", people={"tom", "mary"}, stuff=[1, 2, 3, None], things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}).create()
+
+        model = Meta.many(people={"tom", "mary"})
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(stuff=[1, 2, 3, {"relations.io": {"1": None}}])
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]})
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(stuff__1=2)
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(things__a__b__0=1)
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(things__a__c__like="su")
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(things__a__d__null=True)
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(things____4=5)
+        self.assertEqual(model[0].name, "dive")
+
+        model = Meta.many(things__a__b__0__gt=1)
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(things__a__c__notlike="su")
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(things__a__d__null=False)
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(things___4=6)
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(things__a__b__has=1)
+        self.assertEqual(len(model), 1)
+
+        model = Meta.many(things__a__b__has=3)
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(things__a__b__any=[1, 3])
+        self.assertEqual(len(model), 1)
+
+        model = Meta.many(things__a__b__any=[4, 3])
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(things__a__b__all=[2, 1])
+        self.assertEqual(len(model), 1)
+
+        model = Meta.many(things__a__b__all=[3, 2, 1])
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(people__has="mary")
+        self.assertEqual(len(model), 1)
+
+        model = Meta.many(people__has="dick")
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(people__any=["mary", "dick"])
+        self.assertEqual(len(model), 1)
+
+        model = Meta.many(people__any=["harry", "dick"])
+        self.assertEqual(len(model), 0)
+
+        model = Meta.many(people__all=["mary", "tom"])
+        self.assertEqual(len(model), 1)
+
+        model = Meta.many(people__all=["tom", "dick", "mary"])
+        self.assertEqual(len(model), 0)
+
+        Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
+        Net().create()
+
+        model = Net.many(like='1.2.3.')
+        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
+
+        model = Net.many(ip__address__like='1.2.3.')
+        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
+
+        model = Net.many(ip__value__gt=int(ipaddress.IPv4Address('1.2.3.0')))
+        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
+
+        model = Net.many(subnet__address__like='1.2.3.')
+        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
+
+        model = Net.many(subnet__min_value=int(ipaddress.IPv4Address('1.2.3.0')))
+        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
+
+        model = Net.many(ip__address__notlike='1.2.3.')
+        self.assertEqual(len(model), 0)
+
+        model = Net.many(ip__value__lt=int(ipaddress.IPv4Address('1.2.3.0')))
+        self.assertEqual(len(model), 0)
+
+        model = Net.many(subnet__address__notlike='1.2.3.')
+        self.assertEqual(len(model), 0)
+
+        model = Net.many(subnet__max_value=int(ipaddress.IPv4Address('1.2.3.0')))
+        self.assertEqual(len(model), 0)
+
+    def test_retrieve_stream(self):
+
+        Unit([["people"], ["stuff"], ["things"]]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertRaisesRegex(relations.ModelError, "unit: cannot stream one", Unit.one().retrieve, stream=True)
+
+        units = Unit.many().retrieve(stream=2)
+        self.source.session.get.assert_not_called()
+
+        unit = next(units)
+        self.assertEqual(unit.name, "people")
+        self.assertEqual(unit._action, "update")
+        self.source.session.get.assert_called_once_with("/unit", json={
+            "filter": {},
+            "limit": {"per_page": 2, "start": 0}
+        })
+
+        self.assertEqual([unit.name for unit in units], ["stuff", "things"])
+        self.assertEqual(self.source.session.get.call_count, 2)
+        self.source.session.get.assert_called_with("/unit", json={
+            "filter": {},
+            "limit": {"per_page": 2, "start": 2}
+        })
+
+        model = Unit.many()
+        self.assertEqual([unit.name for unit in model.retrieve(stream=True)], ["people", "stuff", "things"])
+        self.assertFalse(model.overflow)
+
+        model = Unit.many().sort("-name").limit(2, 1)
+        self.assertEqual([unit.name for unit in model.retrieve(stream=1)], ["stuff", "people"])
+        self.assertTrue(model.overflow)
+        self.source.session.get.assert_called_with("/unit", json={
+            "filter": {},
+            "sort": ["-name"],
+            "limit": {"per_page": 1, "start": 2}
+        })
+
+        model = Unit.many(name__in=["people", "things"]).limit(5)
+        self.assertEqual([unit.name for unit in model.retrieve(stream=10)], ["people", "things"])
+        self.assertFalse(model.overflow)
+
+        # pages aren't cached
+
+        self.source.cache = relations_rest.Cache()
+        self.assertEqual([unit.name for unit in Unit.many().retrieve(stream=2)], ["people", "stuff", "things"])
+        self.assertEqual(len(self.source.cache.entries), 0)
+        self.source.cache = None
+
+    def test_retrieve_parallel(self):
+
+        Unit([["people"], ["stuff"], ["things"], ["zeds"], ["yous"]]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertRaisesRegex(relations.ModelError, "unit: cannot parallel one", Unit.one().retrieve, parallel=True)
+
+        model = Unit.many().retrieve(parallel=2)
+        self.assertEqual(model.name, ["people", "stuff", "things", "yous", "zeds"])
+        self.assertEqual(model._action, "update")
+        self.assertFalse(model.overflow)
+
+        self.assertEqual(self.source.session.get.call_count, 4)
+        self.source.session.get.assert_any_call("/unit", json={"filter": {}, "count": True})
+        self.source.session.get.assert_any_call("/unit", json={"filter": {}, "limit": {"per_page": 2, "start": 0}})
+        self.source.session.get.assert_any_call("/unit", json={"filter": {}, "limit": {"per_page": 2, "start": 2}})
+        self.source.session.get.assert_any_call("/unit", json={"filter": {}, "limit": {"per_page": 1, "start": 4}})
+
+        model = Unit.many().sort("-name").limit(3, 1).retrieve(parallel=2)
+        self.assertEqual(model.name, ["yous", "things", "stuff"])
+        self.assertTrue(model.overflow)
+
+        model = Unit.many(name__in=["people", "zeds"]).limit(5).retrieve(parallel=True)
+        self.assertEqual(model.name, ["people", "zeds"])
+        self.assertFalse(model.overflow)
+
+        model = Unit.many(name="nope").retrieve(parallel=True)
+        self.assertEqual(model._models, [])
+
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test_project(self):
+
+        source = relations_rest.Source("RestSource", "http://unit.com", session="sesh")
+
+        self.assertEqual(source.project(Unit.many(), ["name"]), ["id", "name"])
+        self.assertEqual(source.project(Unit.many(), ["name", "id", "name"]), ["id", "name"])
+        self.assertEqual(source.project(Meta.many(), ["push", "things__a"]), ["id", "push", "stuff", "things"])
+        self.assertEqual(source.project(Plain.many(), ["name"]), ["name"])
+
+        self.assertRaisesRegex(relations.ModelError, "unit: unknown field 'nope'", source.project, Unit.many(), ["nope"])
+
+        self.assertEqual(source.retrieve_body(Meta.many(), ["id", "push", "stuff"]), {"filter": {}, "fields": ["id", "stuff"]})
+
+    def test_partial(self):
+
+        unit = Unit()
+        record = unit._record = self.source.partial(unit, {"id": 1}, ["id"])
+
+        self.assertIsInstance(record, relations_rest.Partial)
+        self.assertEqual(record._action, "update")
+        self.assertEqual(record._loaded, {"id"})
+
+        self.assertEqual(unit.id, 1)
+        self.assertEqual(unit[0], 1)
+        self.assertRaisesRegex(relations.RecordError, "field 'name' not retrieved", getattr, unit, "name")
+        self.assertRaisesRegex(relations.RecordError, "field 'name' not retrieved", unit.__getitem__, 1)
+        self.assertRaisesRegex(relations.RecordError, "field 'name' not retrieved", getattr, record, "name")
+
+        unit.name = "stuff"
+        self.assertEqual(unit.name, "stuff")
+        self.assertEqual(record._loaded, {"id", "name"})
+
+    def test_retrieve_fields(self):
+
+        Unit([["people"], ["stuff"]]).create()
+        Meta("dive", stuff=[1, None], things={"a": 1}, push="yep").create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit.many().retrieve(fields=["name"])
+        self.source.session.get.assert_called_once_with("/unit", json={"filter": {}, "fields": ["id", "name"]})
+        self.assertEqual(units.name, ["people", "stuff"])
+
+        units = Unit.many().retrieve(fields=[])
+        self.assertEqual(units.id, [1, 2])
+        self.assertRaisesRegex(relations.RecordError, "field 'name' not retrieved", getattr, units, "name")
+
+        unit = Unit.one(name="people").retrieve(fields=[])
+        self.assertRaisesRegex(relations.RecordError, "field 'name' not retrieved", getattr, unit, "name")
+
+        unit.name = "persons"
+        unit.update()
+        self.assertEqual(Unit.one(1).name, "persons")
+
+        self.assertEqual([unit.id for unit in Unit.many().retrieve(stream=1, fields=[])], [1, 2])
+        self.assertEqual(Unit.many().retrieve(parallel=1, fields=["name"]).name, ["persons", "stuff"])
+
+        meta = Meta.one(name="dive").retrieve(fields=["push"])
+        self.assertEqual(meta.push, "yep")
+        self.assertEqual(meta.stuff, [1, {"relations.io": {"1": "yep"}}])
+        self.assertRaisesRegex(relations.RecordError, "field 'things' not retrieved", getattr, meta, "things")
+
+        # what's not retrieved isn't exported or sent
+
+        meta = Meta.one(name="dive").retrieve(fields=["name"])
+        self.assertEqual(meta.export(), {"id": 1, "name": "dive"})
+
+        self.source.session.patch = unittest.mock.MagicMock(wraps=self.source.session.patch)
+
+        meta.name = "dove"
+        self.assertEqual(meta.update(), 1)
+        self.source.session.patch.assert_called_once_with("/meta/1", **self.source.encode({"meta": {"name": "dove"}}))
+
+        meta = Meta.one(1).retrieve()
+        self.assertEqual(meta.name, "dove")
+        self.assertEqual(meta.people, set())
+        self.assertEqual(meta.things, {"a": 1})
+
+    def test_scope(self):
+
+        Unit([["people"], ["stuff"], ["things"]]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertIsNone(self.source.identity)
+
+        with self.source.scope() as scope:
+
+            self.assertIs(self.source.identity, scope)
+
+            unit = Unit.one(1).retrieve()
+            self.assertEqual(self.source.session.get.call_count, 1)
+
+            again = Unit.one(1).retrieve()
+            self.assertEqual(self.source.session.get.call_count, 1)
+            self.assertIs(again._record, unit._record)
+
+            # the same record by other criteria
+
+            named = Unit.one(name="people").retrieve()
+            self.assertEqual(self.source.session.get.call_count, 2)
+            self.assertIs(named._record, unit._record)
+
+            # collections merge into what's mapped
+
+            units = Unit.many().retrieve()
+            self.assertIs(units[0], unit)
+            self.assertIs(Unit.many().retrieve()[1], units[1])
+
+            unit.name = "persons"
+            self.assertEqual(again.name, "persons")
+            unit.update()
+            self.assertIs(scope.get("unit", 1), unit)
+
+            # updated elsewhere, evicted
+
+            outside = Unit(_read={"id": 2, "name": "stuff"})
+            outside.name = "stuffs"
+            outside.update()
+            self.assertIsNone(scope.get("unit", 2))
+            self.assertEqual(Unit.one(2).retrieve().name, "stuffs")
+
+            # mass update evicts the endpoint
+
+            Unit.many(name="things").set(name="thing").update()
+            self.assertEqual(scope.models, {})
+            self.assertEqual(Unit.one(3).retrieve().name, "thing")
+
+            # deletes evict
+
+            Unit.one(3).retrieve().delete()
+            self.assertIsNone(scope.get("unit", 3))
+
+            calls = self.source.session.get.call_count
+            self.assertIsNone(Unit.one(3).retrieve(False))
+            self.assertEqual(self.source.session.get.call_count, calls + 1)
+
+            Unit.one(2).retrieve()
+            Unit.many(id=2).delete()
+            self.assertEqual(scope.models, {})
+
+            # projected retrieves aren't mapped
+
+            Unit.one(1).retrieve(fields=[])
+            self.assertEqual(scope.models, {})
+
+        # what's retrieved again refreshes what's mapped, unless it has changes not saved
+
+        upstream = self.app.test_client()
+
+        with self.source.scope() as scope:
+
+            unit = Unit.one(1).retrieve()
+            self.assertEqual(unit.name, "persons")
+
+            upstream.patch("/unit/1", json={"unit": {"name": "changed"}})
+
+            changed = Unit.one(name="changed").retrieve()
+            self.assertIs(changed._record, unit._record)
+            self.assertEqual(changed.name, "changed")
+            self.assertEqual(Unit.many(name="changed").retrieve()[0].name, "changed")
+
+            unit.name = "local"
+
+            upstream.patch("/unit/1", json={"unit": {"name": "again"}})
+
+            self.assertIs(Unit.many(name="again").retrieve()[0], unit)
+            self.assertEqual(unit.name, "local")
+            self.assertEqual(Unit.one(name="again").retrieve().name, "local")
+
+        self.assertIsNone(self.source.identity)
+
+        calls = self.source.session.get.call_count
+        self.assertIsNot(Unit.one(1).retrieve()._record, Unit.one(1).retrieve()._record)
+        self.assertEqual(self.source.session.get.call_count, calls + 2)
+
+    def test_retrieve_include(self):
+
+        Unit([["people"], ["stuff"], ["things"]]).create()
+        Test([[1, "a"], [1, "b"], [2, "c"]]).create()
+        Case([[1, "x"], [3, "z"]]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit.many().retrieve(include=["test"])
+
+        self.assertEqual(self.source.session.get.call_count, 2)
+        self.source.session.get.assert_called_with("/test", json={"filter": {"unit_id__in": [1, 2, 3]}})
+
+        self.assertEqual([unit.test.name for unit in units], [["a", "b"], ["c"], []])
+        self.assertEqual(units[0].test[1].unit_id, 1)
+        self.assertEqual(self.source.session.get.call_count, 2)
+
+        # parents and one to one children
+
+        self.source.session.get.reset_mock()
+
+        tests = Test.many().retrieve(include=["unit", "case"])
+
+        self.assertEqual(self.source.session.get.call_count, 3)
+        self.assertEqual([test.unit.name for test in tests], ["people", "people", "stuff"])
+        self.assertEqual(tests[0].case.name, "x")
+        self.assertEqual(tests[2].case.name, "z")
+        self.assertEqual(self.source.session.get.call_count, 3)
+
+        # those without any have none, without asking again
+
+        self.assertRaisesRegex(relations.ModelError, "case: no record", getattr, tests[1].case, "name")
+
+        test = Test.one(name="c").retrieve(include=["unit"])
+        self.assertEqual(test.unit.name, "stuff")
+        self.assertEqual(self.source.session.get.call_count, 5)
+
+        # more than a page is all retrieved
+
+        Test([[3, f"t{index}"] for index in range(100)]).create()
+
+        self.source.session.get.reset_mock()
+
+        units = Unit.many(id=3).retrieve(include=["test"])
+        self.assertEqual(len(units[0].test), 100)
+        self.assertEqual(self.source.session.get.call_count, 4)
+
+        # in chunks if chunk is set, parents and children
+
+        self.source.chunk = 2
+        self.source.session.get.reset_mock()
+
+        units = Unit.many().retrieve(include=["test"])
+
+        self.assertEqual(self.source.session.get.call_count, 5)
+        self.source.session.get.assert_any_call("/test", json={"filter": {"unit_id__in": [1, 2]}})
+        self.source.session.get.assert_any_call("/test", json={"filter": {"unit_id__in": [3]}})
+        self.assertEqual([len(unit.test) for unit in units], [2, 1, 100])
+
+        self.source.session.get.reset_mock()
+
+        tests = Test.many(name__in=["a", "c", "t0"]).retrieve(include=["unit"])
+
+        self.assertEqual(self.source.session.get.call_count, 3)
+        self.source.session.get.assert_any_call("/unit", json={"filter": {"id__in": [1, 2]}})
+        self.source.session.get.assert_any_call("/unit", json={"filter": {"id__in": [3]}})
+        self.assertEqual([test.unit.name for test in tests], ["people", "stuff", "things"])
+
+        self.source.chunk = None
+
+        # through the relative's own source, or left to retrieve itself if not REST
+
+        class Owner(relations.Model):
+            SOURCE = "RestSource"
+            ENDPOINT = "unit"
+            SINGULAR = "unit"
+            PLURAL = "units"
+            id = int
+            name = str
+
+        class Owned(relations.Model):
+            SOURCE = "OtherSource"
+            ENDPOINT = "test"
+            SINGULAR = "test"
+            PLURAL = "tests"
+            id = int
+            unit_id = int
+            name = str
+
+        class Mocked(relations.Model):
+            SOURCE = "MockedSource"
+            id = int
+            unit_id = int
+
+        relations.OneToMany(Owner, Owned, child_field="unit_id")
+        relations.OneToMany(Owner, Mocked, child_field="unit_id")
+
+        other = relations_rest.Source("OtherSource", "", unittest.mock.MagicMock(wraps=Session(self.app.test_client())))
+        relations.unittest.MockSource("MockedSource")
+
+        self.source.session.get.reset_mock()
+
+        owners = Owner.many(id__in=[1, 2]).retrieve(include=["owned", "mocked"])
+
+        self.assertEqual(self.source.session.get.call_count, 1)
+        other.session.get.assert_called_once_with("/test", json={"filter": {"unit_id__in": [1, 2]}})
+        self.assertEqual([owner.owned.name for owner in owners], [["a", "b"], ["c"]])
+        self.assertIsNone(owners[0]._children.get("mocked"))
+
+        self.assertRaisesRegex(relations.ModelError, "unit: unknown relation 'nope'", Unit.many().retrieve, include=["nope"])
+        self.assertRaisesRegex(relations.ModelError, "unit: cannot include when streaming", Unit.many().retrieve, stream=True, include=["test"])
+
+    def test_retrieve_cursor(self):
+
+        Unit([[f"unit{index}"] for index in range(5)]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit.many().limit(2).retrieve(cursor=True)
+
+        self.assertEqual(units.id, [1, 2])
+        self.assertEqual(units._cursor, relations_rest.Source.continuation("+id", 2))
+        self.source.session.get.assert_called_once_with("/unit", json={
+            "filter": {}, "sort": ["+id"], "limit": {"per_page": 2}
+        })
+
+        units = Unit.many().limit(2).retrieve(cursor=units._cursor)
+
+        self.assertEqual(units.id, [3, 4])
+        self.source.session.get.assert_called_with("/unit", json={
+            "filter": {"id__gt": 2}, "sort": ["+id"], "limit": {"per_page": 2}
+        })
+
+        # a short page is the last
+
+        units = Unit.many().limit(2).retrieve(cursor=units._cursor, total=True)
+
+        self.assertEqual(units.id, [5])
+        self.assertEqual(units._total, 5)
+        self.assertIsNone(units._cursor)
+
+        # descending by a sort, projected, paging CHUNK by default
+
+        units = Unit.many(name__not_eq="unit2").sort("-name").retrieve(cursor=True, fields=[])
+
+        self.assertEqual(units.name, ["unit4", "unit3", "unit1", "unit0"])
+        self.assertIsNone(units._cursor)
+
+        units = Unit.many().sort("-name").limit(3).retrieve(cursor=True)
+        self.assertEqual(units.name, ["unit4", "unit3", "unit2"])
+
+        units = Unit.many().sort("-name").limit(3).retrieve(cursor=units._cursor)
+        self.assertEqual(units.name, ["unit1", "unit0"])
+
+        # ties broken by id, nothing skipped
+
+        Unit([["unit1"], ["unit1"]]).create()
+
+        self.source.session.get.reset_mock()
+
+        units = Unit.many().sort("name").limit(2).retrieve(cursor=True)
+        self.assertEqual(units.id, [1, 2])
+        self.source.session.get.assert_called_once_with("/unit", json={
+            "filter": {}, "sort": ["+name", "+id"], "limit": {"per_page": 2}
+        })
+
+        ids = list(units.id)
+
+        while units._cursor is not None:
+            units = Unit.many().sort("name").limit(2).retrieve(cursor=units._cursor)
+            ids.extend(units.id)
+
+        self.assertEqual(ids, [1, 2, 6, 7, 3, 4, 5])
+
+        self.source.session.get.assert_any_call("/unit", json={
+            "filter": {"name__eq": "unit1", "id__gt": 2}, "sort": ["+name", "+id"], "limit": {"per_page": 2}
+        })
+        self.source.session.get.assert_any_call("/unit", json={
+            "filter": {"name__gt": "unit1"}, "sort": ["+name", "+id"], "limit": {"per_page": 2}
+        })
+
+        self.assertRaisesRegex(
+            relations.ModelError, "unit: cursor only pages by one sort", Unit.many().sort("name", "-id").retrieve, cursor=True
+        )
+        self.assertRaisesRegex(
+            relations.ModelError, "unit: invalid cursor",
+            Unit.many().sort("name").retrieve, cursor=relations_rest.Source.continuation("+name", "unit1")
+        )
+
+        self.assertRaisesRegex(
+            relations.ModelError, "unit: cursor not for sort \\+id",
+            Unit.many().retrieve, cursor=relations_rest.Source.continuation("-name", "unit2")
+        )
+        self.assertRaisesRegex(relations.ModelError, "unit: invalid cursor nope", Unit.many().retrieve, cursor="nope")
+        self.assertRaisesRegex(
+            relations.ModelError, "unit: cursor only retrieves many, without an offset or batching",
+            Unit.many().limit(2, 2).retrieve, cursor=True
+        )
+
+    def test_retrieve_total(self):
+
+        Unit([["people"], ["stuff"], ["things"]]).create()
+        Meta([["people"], ["stuff"], ["things"]]).create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit.many(name__not_eq="stuff").limit(1).retrieve(total=True)
+
+        self.assertEqual(units.name, ["people"])
+        self.assertEqual(units._total, 2)
+        self.assertTrue(units.overflow)
+        self.source.session.get.assert_called_once_with("/unit", json={
+            "filter": {"name__not_eq": "stuff"}, "limit": {"per_page": 1}, "total": True
+        })
+
+        units = Unit.many().limit(2, 2).retrieve(total=True)
+        self.assertEqual(units.name, ["things"])
+        self.assertEqual(units._total, 3)
+
+        # not sent, so counted
+
+        self.source.session.get.reset_mock()
+
+        metas = Meta.many().limit(1).retrieve(total=True)
+        self.assertEqual(metas._total, 3)
+        self.assertEqual(self.source.session.get.call_count, 2)
+        self.source.session.get.assert_called_with("/meta", json={"filter": {}, "count": True})
+
+        self.assertEqual(Unit.many().retrieve(parallel=1)._total, 3)
+        self.assertIsNone(Unit.many().retrieve()._total)
+
+    def test_retrieve_lazy(self):
+
+        Unit([["people"], ["stuff"], ["things"]]).create()
+
+        units = Unit.many().sort("-name").retrieve(lazy=True)
+
+        self.assertIsInstance(units._models, relations_rest.Lazy)
+        self.assertEqual(len(units), 3)
+        self.assertEqual(units._models.built(), 0)
+
+        self.assertEqual(units[0].name, "things")
+        self.assertEqual(units._models.built(), 1)
+
+        self.assertEqual(units.name, ["things", "stuff", "people"])
+        self.assertEqual(units._models.built(), 3)
+
+        units.name = "same"
+        self.assertEqual(units.update(), 3)
+        self.assertEqual(Unit.many().name, ["same", "same", "same"])
+
+        units = Unit.many().retrieve(lazy=True, parallel=2, fields=[])
+        self.assertEqual([unit.id for unit in units], [1, 2, 3])
+        self.assertRaisesRegex(relations.RecordError, "field 'name' not retrieved", getattr, units[0], "name")
+
+        unit = Unit.one(1).retrieve(lazy=True)
+        self.assertIsNone(unit._models)
+        self.assertEqual(unit.name, "same")
+
+    def test_titles(self):
+
+        Unit("people").create().test.add("stuff").add("things").create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        titles = Unit.many().titles()
+
+        self.assertEqual(titles.id, "id")
+        self.assertEqual(titles.fields, ["name"])
+        self.assertEqual(titles.parents, {})
+        self.assertEqual(titles.format, ["fancy"])
+
+        self.assertEqual(titles.ids, [1])
+        self.assertEqual(titles.titles,{1: ["people"]})
+
+        self.source.session.get.assert_called_once_with("/unit", json={"filter": {}, "fields": ["id", "name"]})
+
+        titles = Test.many().titles()
+
+        self.assertEqual(titles.id, "id")
+        self.assertEqual(titles.fields, ["unit_id", "name"])
+
+        self.assertEqual(titles.parents["unit_id"].id, "id")
+        self.assertEqual(titles.parents["unit_id"].fields, ["name"])
+        self.assertEqual(titles.parents["unit_id"].parents, {})
+        self.assertEqual(titles.parents["unit_id"].format, ["fancy"])
+
+        self.assertEqual(titles.format, ["fancy", "shmancy"])
+
+        self.assertEqual(titles.ids, [1, 2])
+        self.assertEqual(titles.titles, {
+            1: ["people", "stuff"],
+            2: ["people", "things"]
+        })
+
+        Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
+
+        self.assertEqual(Net.many().titles().titles, {
+            1: ["1.2.3.4"]
+        })
+
+    def test_titles_fields(self):
+
+        self.assertEqual(self.source.titles_fields(Unit.many()), ["name"])
+        self.assertEqual(self.source.titles_fields(Test.many()), ["unit_id", "name"])
+        self.assertEqual(self.source.titles_fields(Net.many()), ["ip__address", "ip__value"])
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
+
+        self.assertEqual(Net.many().titles().titles, {1: ["1.2.3.4"]})
+        self.source.session.get.assert_called_once_with("/net", json={"filter": {}, "fields": ["id", "ip"]})
+
+    def test_titles_cache(self):
+
+        Unit("people").create().test.add("stuff").add("things").create()
+
+        self.source.titles_cache = relations_rest.Cache()
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertEqual(Test.many().titles().titles, {1: ["people", "stuff"], 2: ["people", "things"]})
+        self.assertEqual(self.source.session.get.call_count, 2)
+
+        titles = Test.many().titles()
+        self.assertEqual(titles.titles, {1: ["people", "stuff"], 2: ["people", "things"]})
+        self.assertEqual(titles.parents["unit_id"].titles, {1: ["people"]})
+        self.assertEqual(Unit.many().titles().titles, {1: ["people"]})
+        self.assertEqual(self.source.session.get.call_count, 3)
+        self.assertEqual(Test.many(name="stuff").titles().titles, {1: ["people", "stuff"]})
+        self.assertEqual(self.source.session.get.call_count, 5)
+
+        titles.titles[1] = ["changed"]
+        self.assertEqual(Test.many().titles().titles[1], ["people", "stuff"])
+
+        self.assertEqual(self.source.dependents, {"unit": {"test"}})
+
+        # writing a parent refreshes its children's
+
+        Unit.one(1).set(name="persons").update()
+        self.assertEqual(self.source.titles_cache.stats()["size"], 0)
+
+        self.assertEqual(Test.many().titles().titles, {1: ["persons", "stuff"], 2: ["persons", "things"]})
+
+        # writing a child leaves its parent's be
+
+        Test.one(1).set(name="stuffs").update()
+
+        self.assertEqual(self.source.titles_cache.stats()["size"], 1)
+        self.assertEqual(Test.many().titles().titles, {1: ["persons", "stuffs"], 2: ["persons", "things"]})
+
+        # already retrieved isn't cached
+
+        units = Unit.many().retrieve()
+        self.assertEqual(units.titles().titles, {1: ["persons"]})
+        self.assertEqual(self.source.titles_cache.stats()["size"], 2)
+
+    def test_update_field(self):
+
+        # Standard
+
+        field = relations.Field(int, name="id")
+        self.source.field_init(field)
+        values = {}
+        field.value = 1
+        self.source.update_field(field, values)
+        self.assertEqual(values, {"id": 1})
+
+        # not changed
+
+        values = {}
+        self.source.update_field(field, values)
+        self.assertEqual(values, {})
+
+        # auto
+
+        field = relations.Field(int, name="id", auto=True)
+        self.source.field_init(field)
+        values = {}
+        field.value = 1
+        self.source.update_field(field, values)
+        self.assertEqual(values, {})
+
+    def test_field_mass(self):
+
+        # Standard
+
+        field = relations.Field(int, name="id")
+        self.source.field_init(field)
+        values = {}
+        field.value = 1
+        self.source.update_field(field, values)
+        self.assertEqual(values, {"id": 1})
+
+        # not changed
+
+        field.changed = False
+        values = {}
+        self.source.update_field(field, values)
+        self.assertEqual(values, {})
+        self.assertFalse(field.changed)
+
+        # auto
+
+        field = relations.Field(int, name="id", auto=True)
+        self.source.field_init(field)
+        values = {}
+        field.value = 1
+        self.source.update_field(field, values)
+        self.assertEqual(values, {})
+
+    def test_update(self):
+
+        Unit([["people"], ["stuff"]]).create()
+
+        unit = Unit.many(id=2).set(name="things")
+
+        self.assertEqual(unit.update(), 1)
+
+        unit = Unit.one(2)
+
+        unit.name = "thing"
+        unit.test.add("moar")
+
+        self.assertEqual(unit.update(), 1)
+        self.assertEqual(unit.name, "thing")
+        self.assertEqual(unit.test[0].id, 1)
+        self.assertEqual(unit.test[0].name, "moar")
+
+        plain = Plain.one()
+        self.assertRaisesRegex(relations.ModelError, "plain: nothing to update from", plain.update)
+
+        net = Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
+
+        Net.one(net.id).set(ip="5.6.7.8").update()
+        self.assertEqual(Net.one(net.id).ip.compressed, "5.6.7.8")
+
+        meta = Meta("dive", people={"tom", "mary"}, stuff=[1, 2, 3, None], things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}).create()
+
+        meta.things["a"]["b"][0] = 3
+        self.assertEqual(meta.things__a__b__0, 3)
+
+        meta.update()
+
+        meta = Meta.one(meta.id)
+
+        self.assertEqual(meta.things__a__b__0, 3)
+
+    def test_bulk_body(self):
+
+        Unit([["people"], ["stuff"]]).create()
+
+        units = Unit.many().retrieve()
+        units[0].name = "persons"
+
+        self.assertEqual(self.source.bulk_body(units, units._models), {
+            "units": [
+                {"id": 1, "name": "persons"},
+                {"id": 2}
+            ]
+        })
+
+    def test_update_bulk(self):
+
+        Unit([["people"], ["stuff"], ["things"]]).create()
+
+        self.source.bulk = True
+        self.source.chunk = 2
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        units = Unit.many().retrieve()
+        units[0].name = "persons"
+        units[2].name = "items"
+        units[2].test.add("moar")
+
+        self.assertEqual(units.update(), 3)
+
+        self.assertEqual(self.source.session.patch.call_count, 2)
+        self.source.session.patch.assert_any_call("/unit", **self.source.encode({"units": [{"id": 1, "name": "persons"}, {"id": 2}]}))
+        self.source.session.patch.assert_any_call("/unit", **self.source.encode({"units": [{"id": 3, "name": "items"}]}))
+
+        self.assertEqual(Unit.many().name, ["items", "persons", "stuff"])
+        self.assertEqual(Test.one().name, "moar")
+        self.assertEqual(Test.one().unit_id, 3)
+
+        unit = Unit.one(2)
+        unit.name = "stuffs"
+        self.assertEqual(unit.update(), 1)
+        self.source.session.patch.assert_called_with("/unit", **self.source.encode({"units": [{"id": 2, "name": "stuffs"}]}))
+
+        self.assertEqual(Unit.many().set(name="same").update(), 3)
+        self.source.session.patch.assert_called_with("/unit", **self.source.encode({"filter": {}, "units": {"name": "same"}}))
+
+    def test_delete(self):
+
+        unit = Unit("people")
+        unit.test.add("stuff").add("things")
+        unit.create()
+
+        self.assertEqual(Test.one(id=2).delete(), 1)
+        self.assertEqual(len(Test.many()), 1)
+
+        self.assertEqual(Unit.one(1).test.delete(), 1)
+        self.assertEqual(Unit.one(1).retrieve().delete(), 1)
+        self.assertEqual(len(Unit.many()), 0)
+        self.assertEqual(len(Test.many()), 0)
+
+        plain = Plain(0, "nope").create()
+        self.assertRaisesRegex(relations.ModelError, "plain: nothing to delete from", plain.delete)
+
+    def test_delete_chunk(self):
+
+        Unit([["a"], ["b"], ["c"], ["d"], ["e"]]).create()
+
+        session = self.source.session
+
+        self.source.chunk = 2
+        self.source.session = unittest.mock.MagicMock(wraps=session)
+
+        units = Unit.many().retrieve()
+
+        self.assertEqual(units.delete(), 5)
+        self.assertEqual(self.source.session.delete.call_count, 3)
+        self.source.session.delete.assert_any_call("/unit", **self.source.encode({"filter": {"id__in": [1, 2]}}))
+        self.source.session.delete.assert_any_call("/unit", **self.source.encode({"filter": {"id__in": [3, 4]}}))
+        self.source.session.delete.assert_any_call("/unit", **self.source.encode({"filter": {"id__in": [5]}}))
+        self.assertEqual(units._action, "create")
+        self.assertEqual([unit._action for unit in units], ["create"] * 5)
+        self.assertEqual(Unit.many().count(), 0)
+
+        Unit([["f"], ["g"], ["h"]]).create()
+
+        def fail(url, data, headers):
+
+            if 7 in json.loads(data)["filter"]["id__in"]:
+                return session.delete(url, json={})
+
+            return session.delete(url, data=data, headers=headers)
+
+        self.source.session.delete.side_effect = fail
+
+        units = Unit.many().retrieve()
+
+        self.assertRaisesRegex(relations.ModelError, "unit: to confirm all, send a blank filter {}", units.delete)
+        self.assertEqual(units._action, "update")
+        self.assertEqual([unit._action for unit in units], ["update", "update", "create"])
+        self.assertEqual(Unit.many().name, ["f", "g"])
+
+        self.source.session.delete.side_effect = None
+
+        self.assertEqual(units.delete(), 2)
+        self.assertEqual([unit._action for unit in units], ["create", "create", "create"])
+
+        calls = self.source.session.delete.call_count
+        self.assertEqual(Unit.many().retrieve().delete(), 0)
+        self.assertEqual(self.source.session.delete.call_count, calls)
+
+    def test_batch(self):
+
+        Unit("people").create()
+
+        self.source.session = unittest.mock.MagicMock(wraps=self.source.session)
+
+        self.assertIsNone(self.source.batching)
+
+        with self.source.batch() as batch:
+
+            self.assertIs(self.source.batching, batch)
+            self.assertRaisesRegex(relations.ModelError, "batch: already batching", self.source.batch().__enter__)
+
+            unit = Unit("stuff")
+            created = unit.create()
+            counted = Unit.many().count()
+            units = Unit.many(name__in=["people", "stuff"])
+            retrieved = units.retrieve()
+
+            self.assertRaisesRegex(relations.ModelError, "unit: cannot parallel in a batch", Unit.many().retrieve, parallel=True)
+
+            self.assertFalse(created.done())
+            self.source.session.post.assert_not_called()
+
+        self.assertIsNone(self.source.batching)
+
+        self.source.session.get.assert_not_called()
+        self.source.session.post.assert_called_once_with("/batch", **self.source.encode({"requests": [
+            {"method": "POST", "path": "unit", "body": {"units": [{"name": "stuff"}]}},
+            {"method": "GET", "path": "unit", "body": {"filter": {}, "count": True}},
+            {"method": "GET", "path": "unit", "body": {"filter": {"name__in": ["people", "stuff"]}}}
+        ]}))
+
+        self.assertIs(created.result(), unit)
+        self.assertEqual(unit.id, 2)
+        self.assertEqual(unit._action, "update")
+        self.assertEqual(counted.result(), 2)
+        self.assertIs(retrieved.result(), units)
+        self.assertEqual(units.name, ["people", "stuff"])
+
+        # updates and deletes, by id and en masse
+
+        with self.source.batch():
+            unit.name = "things"
+            updated = unit.update()
+            mass = Unit.many(name="people").set(name="persons").update()
+            deleted = Unit.many(name="persons").delete()
+
+        self.assertEqual(updated.result(), 1)
+        self.assertEqual(mass.result(), 1)
+        self.assertEqual(deleted.result(), 1)
+        self.assertEqual(Unit.many().name, ["things"])
+
+        # each slot's checked, the rest still finished
+
+        self.source.session.post.reset_mock()
+
+        with self.assertRaisesRegex(relations.ModelError, "unit: unit: none retrieved"):
+            with self.source.batch():
+                missing = Unit(_read={"id": 99, "name": "nope"})
+                missing.name = "nah"
+                failed = missing.update()
+                units = Unit.many()
+                units.retrieve()
+
+        self.assertIsInstance(failed.exception(), relations.ModelError)
+        self.assertEqual(units.name, ["things"])
+        self.assertEqual(self.source.session.post.call_count, 1)
+
+        # nothing sent if nothing queued, or if raised within
+
+        with self.source.batch():
+            pass
+
+        with self.assertRaises(ValueError):
+            with self.source.batch():
+                counted = Unit.many().count()
+                raise ValueError("nope")
+
+        self.assertEqual(self.source.session.post.call_count, 1)
+        self.assertIsNone(self.source.batching)
+
+        # bulk creating past its size queues just what's new each time
+
+        with self.source.batch():
+            simples = Simple.bulk(size=2)
+            for name in ["a", "b", "c", "d", "e"]:
+                simples.add(name)
+            self.assertEqual(simples.name, ["e"])
+            created = simples.create()
+            again = simples.create()
+
+        self.assertIs(created.result(), simples)
+        self.assertIs(again.result(), simples)
+        self.assertEqual(simples._models, [])
+        self.assertEqual(sorted(record["name"] for record in self.resource.data["simple"].values()), ["a", "b", "c", "d", "e"])
+
+        # and what fails to send goes back on
+
+        self.source.session.post.side_effect = requests.ConnectionError("down")
+
+        with self.assertRaises(requests.ConnectionError):
+            with self.source.batch():
+                simples = Simple.bulk(size=2).add("f").add("g").add("h")
+                self.assertEqual(simples.name, ["h"])
+
+        self.assertEqual(simples.name, ["f", "g", "h"])
+
+        self.source.session.post.side_effect = None
+        self.assertRaisesRegex(ValueError, "nope", counted.result, timeout=0)
+
+        # failing to send fails everything queued
+
+        self.source.session.post.side_effect = requests.ConnectionError("down")
+
+        with self.assertRaises(requests.ConnectionError):
+            with self.source.batch():
+                counted = Unit.many().count()
+                units = Unit.many()
+                retrieved = units.retrieve()
+
+        self.assertRaisesRegex(requests.ConnectionError, "down", counted.result, timeout=0)
+        self.assertRaisesRegex(requests.ConnectionError, "down", retrieved.result, timeout=0)
+
+        # as does too few responses
+
+        post = self.source.session.post
+        self.source.session.post.side_effect = None
+
+        def short(url, **kwargs):
+            response = unittest.mock.MagicMock(status_code=200)
+            response.content = json.dumps({"responses": [{"status": 200, "body": {"units": 1}}]}).encode()
+            return response
+
+        self.source.session.post = unittest.mock.MagicMock(side_effect=short)
+
+        with self.assertRaisesRegex(relations.ModelError, "batch: 1 responses for 2 requests"):
+            with self.source.batch():
+                counted = Unit.many().count()
+                retrieved = Unit.many().retrieve()
+
+        self.assertRaisesRegex(relations.ModelError, "1 responses for 2 requests", counted.result, timeout=0)
+        self.assertRaisesRegex(relations.ModelError, "1 responses for 2 requests", retrieved.result, timeout=0)
+
+        self.source.session.post = post
+
+
+class Scenarios:
+    """
+    What both sources have to do alike, awaiting whatever comes back awaitable
+    """
+
+    maxDiff = None
+
+    @staticmethod
+    async def resolve(result):
 
-        self.assertEqual(model.SINGULAR, "people")
-        self.assertEqual(model.PLURAL, "stuff")
-        self.assertEqual(model.ENDPOINT, "things")
+        if inspect.isawaitable(result):
+            return await result
 
-    def test_create(self):
+        return result
+
+    async def test_create(self):
 
         simple = Simple("sure")
         simple.plain.add("fine")
 
-        simple.create()
+        await self.resolve(simple.create())
 
         self.assertEqual(simple.id, 1)
         self.assertEqual(simple._action, "update")
@@ -284,15 +2999,15 @@ class TestSource(unittest.TestCase):
         self.assertEqual(simple.plain._action, "update")
         self.assertEqual(simple.plain[0]._record._action, "update")
 
-        simples = Simple.bulk().add("ya").create()
+        simples = await self.resolve(Simple.bulk().add("ya").create())
 
         self.assertEqual(simples._models, [])
 
-        yep = Meta("yep", True, 3.50, {"tom", "mary"}, [1, None], {"a": 1, "for": [{"1": "yep"}]}, "sure").create()
-        self.assertTrue(Meta.one(yep.id).flag)
+        yep = await self.resolve(Meta("yep", True, 3.50, {"tom", "mary"}, [1, None], {"a": 1, "for": [{"1": "yep"}]}, "sure").create())
+        self.assertTrue((await self.resolve(Meta.one(yep.id).retrieve())).flag)
 
-        nope = Meta("nope", False).create()
-        self.assertFalse(Meta.one(nope.id).flag)
+        nope = await self.resolve(Meta("nope", False).create())
+        self.assertFalse((await self.resolve(Meta.one(nope.id).retrieve())).flag)
 
         self.assertEqual(self.resource.ids, {
             "simple": 2,
@@ -341,45 +3056,42 @@ class TestSource(unittest.TestCase):
             }
         })
 
-    def test_count(self):
+    async def test_count(self):
 
-        Unit([["stuff"], ["people"]]).create()
+        await self.resolve(Unit([["stuff"], ["people"]]).create())
 
-        self.assertEqual(Unit.many().count(), 2)
+        self.assertEqual(await self.resolve(Unit.many().count()), 2)
 
-        self.assertEqual(Unit.many(name="people").count(), 1)
+        self.assertEqual(await self.resolve(Unit.many(name="people").count()), 1)
 
-        self.assertEqual(Unit.many(like="p").count(), 1)
+        self.assertEqual(await self.resolve(Unit.many(like="p").count()), 1)
 
-    def test_retrieve(self):
+    async def test_retrieve(self):
 
-        Unit([["people"], ["stuff"]]).create()
+        await self.resolve(Unit([["people"], ["stuff"]]).create())
 
-        models = Unit.one(name__in=["people", "stuff"])
-        self.assertRaisesRegex(relations.ModelError, "unit: more than one retrieved", models.retrieve)
+        with self.assertRaisesRegex(relations.ModelError, "unit: more than one retrieved"):
+            await self.resolve(Unit.one(name__in=["people", "stuff"]).retrieve())
 
-        model = Unit.one(name="things")
-        self.assertRaisesRegex(relations.ModelError, "unit: none retrieved", model.retrieve)
+        with self.assertRaisesRegex(relations.ModelError, "unit: none retrieved"):
+            await self.resolve(Unit.one(name="things").retrieve())
 
-        self.assertIsNone(model.retrieve(False))
+        self.assertIsNone(await self.resolve(Unit.one(name="things").retrieve(False)))
 
-        unit = Unit.one(name="people")
+        unit = await self.resolve(Unit.one(name="people").retrieve())
 
         self.assertEqual(unit.id, 1)
         self.assertEqual(unit._action, "update")
         self.assertEqual(unit._record._action, "update")
 
-        unit = Unit.one(like="p")
+        unit = await self.resolve(Unit.one(like="p").retrieve())
 
         self.assertEqual(unit.id, 1)
         self.assertEqual(unit._action, "update")
         self.assertEqual(unit._record._action, "update")
 
-        unit.test.add("things")[0].case.add("persons")
-        unit.update()
-
-        Meta("yep", True, 1.1, {"tom"}, [1, None], {"a": 1}).create()
-        model = Meta.one(name="yep")
+        await self.resolve(Meta("yep", True, 1.1, {"tom"}, [1, None], {"a": 1}).create())
+        model = await self.resolve(Meta.one(name="yep").retrieve())
 
         self.assertEqual(model.flag, True)
         self.assertEqual(model.spend, 1.1)
@@ -387,258 +3099,223 @@ class TestSource(unittest.TestCase):
         self.assertEqual(model.stuff, [1, {"relations.io": {"1": None}}])
         self.assertEqual(model.things, {"a": 1})
 
-        self.assertEqual(Unit.many().name, ["people", "stuff"])
-        self.assertEqual(Unit.many().sort("-name").name, ["stuff", "people"])
-        self.assertEqual(Unit.many().sort("-name").limit(1, 1).name, ["people"])
-        self.assertEqual(Unit.many().sort("-name").limit(0).name, [])
-        self.assertEqual(Unit.many(name="people").limit(1).name, ["people"])
-
-        Meta("dive", people={"tom", "mary"}, stuff=[1, 2, 3, None], things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}).create()
-
-        model = Meta.many(people={"tom", "mary"})
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(stuff=[1, 2, 3, {"relations.io": {"1": None}}])
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]})
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(stuff__1=2)
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(things__a__b__0=1)
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(things__a__c__like="su")
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(things__a__d__null=True)
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(things____4=5)
-        self.assertEqual(model[0].name, "dive")
-
-        model = Meta.many(things__a__b__0__gt=1)
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(things__a__c__notlike="su")
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(things__a__d__null=False)
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(things___4=6)
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(things__a__b__has=1)
-        self.assertEqual(len(model), 1)
-
-        model = Meta.many(things__a__b__has=3)
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(things__a__b__any=[1, 3])
-        self.assertEqual(len(model), 1)
-
-        model = Meta.many(things__a__b__any=[4, 3])
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(things__a__b__all=[2, 1])
-        self.assertEqual(len(model), 1)
-
-        model = Meta.many(things__a__b__all=[3, 2, 1])
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(people__has="mary")
-        self.assertEqual(len(model), 1)
-
-        model = Meta.many(people__has="dick")
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(people__any=["mary", "dick"])
-        self.assertEqual(len(model), 1)
-
-        model = Meta.many(people__any=["harry", "dick"])
-        self.assertEqual(len(model), 0)
-
-        model = Meta.many(people__all=["mary", "tom"])
-        self.assertEqual(len(model), 1)
-
-        model = Meta.many(people__all=["tom", "dick", "mary"])
-        self.assertEqual(len(model), 0)
-
-        Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
-        Net().create()
-
-        model = Net.many(like='1.2.3.')
-        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
-
-        model = Net.many(ip__address__like='1.2.3.')
-        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
-
-        model = Net.many(ip__value__gt=int(ipaddress.IPv4Address('1.2.3.0')))
-        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
-
-        model = Net.many(subnet__address__like='1.2.3.')
-        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
-
-        model = Net.many(subnet__min_value=int(ipaddress.IPv4Address('1.2.3.0')))
-        self.assertEqual(model[0].ip.compressed, "1.2.3.4")
-
-        model = Net.many(ip__address__notlike='1.2.3.')
-        self.assertEqual(len(model), 0)
-
-        model = Net.many(ip__value__lt=int(ipaddress.IPv4Address('1.2.3.0')))
-        self.assertEqual(len(model), 0)
-
-        model = Net.many(subnet__address__notlike='1.2.3.')
-        self.assertEqual(len(model), 0)
-
-        model = Net.many(subnet__max_value=int(ipaddress.IPv4Address('1.2.3.0')))
-        self.assertEqual(len(model), 0)
-
-    def test_titles(self):
-
-        Unit("people").create().test.add("stuff").add("things").create()
-
-        titles = Unit.many().titles()
+        self.assertEqual((await self.resolve(Unit.many().retrieve())).name, ["people", "stuff"])
+        self.assertEqual((await self.resolve(Unit.many().sort("-name").retrieve())).name, ["stuff", "people"])
+        self.assertEqual((await self.resolve(Unit.many().sort("-name").limit(1, 1).retrieve())).name, ["people"])
+        self.assertEqual((await self.resolve(Unit.many().sort("-name").limit(0).retrieve())).name, [])
+        self.assertEqual((await self.resolve(Unit.many(name="people").limit(1).retrieve())).name, ["people"])
+
+        self.assertEqual((await self.resolve(Unit.many().limit(1).retrieve(total=True)))._total, 2)
+
+        await self.resolve(Meta("dive", people={"tom", "mary"}, stuff=[1, 2, 3, None], things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}).create())
+
+        for criteria in [
+            {"people": {"tom", "mary"}},
+            {"stuff": [1, 2, 3, {"relations.io": {"1": None}}]},
+            {"things": {"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}},
+            {"stuff__1": 2},
+            {"things__a__b__0": 1},
+            {"things__a__c__like": "su"},
+            {"things____4": 5},
+            {"things__a__b__has": 1},
+            {"things__a__b__any": [1, 3]},
+            {"things__a__b__all": [2, 1]},
+            {"people__has": "mary"},
+            {"people__any": ["mary", "dick"]},
+            {"people__all": ["mary", "tom"]}
+        ]:
+            self.assertEqual((await self.resolve(Meta.many(**criteria).retrieve())).name, ["dive"], criteria)
+
+        self.assertEqual((await self.resolve(Meta.many(things__a__d__null=True).retrieve())).name, ["dive", "yep"])
+
+        for criteria in [
+            {"things__a__b__0__gt": 1},
+            {"things__a__c__notlike": "su"},
+            {"things__a__d__null": False},
+            {"things___4": 6},
+            {"things__a__b__has": 3},
+            {"things__a__b__any": [4, 3]},
+            {"things__a__b__all": [3, 2, 1]},
+            {"people__has": "dick"},
+            {"people__any": ["harry", "dick"]},
+            {"people__all": ["tom", "dick", "mary"]}
+        ]:
+            self.assertEqual(len(await self.resolve(Meta.many(**criteria).retrieve())), 0, criteria)
+            self.assertEqual(await self.resolve(Meta.many(**criteria).count()), 0, criteria)
+
+        await self.resolve(Net(ip="1.2.3.4", subnet="1.2.3.0/24").create())
+        await self.resolve(Net().create())
+
+        for criteria in [
+            {"like": "1.2.3."},
+            {"ip__address__like": "1.2.3."},
+            {"ip__value__gt": int(ipaddress.IPv4Address('1.2.3.0'))},
+            {"subnet__address__like": "1.2.3."},
+            {"subnet__min_value": int(ipaddress.IPv4Address('1.2.3.0'))}
+        ]:
+            self.assertEqual((await self.resolve(Net.many(**criteria).retrieve()))[0].ip.compressed, "1.2.3.4", criteria)
+
+        for criteria in [
+            {"ip__address__notlike": "1.2.3."},
+            {"ip__value__lt": int(ipaddress.IPv4Address('1.2.3.0'))},
+            {"subnet__address__notlike": "1.2.3."},
+            {"subnet__max_value": int(ipaddress.IPv4Address('1.2.3.0'))}
+        ]:
+            self.assertEqual(len(await self.resolve(Net.many(**criteria).retrieve())), 0, criteria)
+
+        self.assertEqual((await self.resolve(Meta.many().limit(0).retrieve(total=True)))._total, 2)
+
+    async def test_titles(self):
+
+        unit = await self.resolve(Unit("people").create())
+        await self.resolve(unit.test.retrieve())
+        await self.resolve(unit.test.add("stuff").add("things").create())
+
+        titles = await self.resolve(Unit.many().titles())
 
         self.assertEqual(titles.id, "id")
         self.assertEqual(titles.fields, ["name"])
         self.assertEqual(titles.parents, {})
         self.assertEqual(titles.format, ["fancy"])
-
         self.assertEqual(titles.ids, [1])
-        self.assertEqual(titles.titles,{1: ["people"]})
+        self.assertEqual(titles.titles, {1: ["people"]})
 
-        titles = Test.many().titles()
+        titles = await self.resolve(Test.many().titles())
 
         self.assertEqual(titles.id, "id")
         self.assertEqual(titles.fields, ["unit_id", "name"])
-
         self.assertEqual(titles.parents["unit_id"].id, "id")
         self.assertEqual(titles.parents["unit_id"].fields, ["name"])
         self.assertEqual(titles.parents["unit_id"].parents, {})
         self.assertEqual(titles.parents["unit_id"].format, ["fancy"])
-
         self.assertEqual(titles.format, ["fancy", "shmancy"])
-
         self.assertEqual(titles.ids, [1, 2])
         self.assertEqual(titles.titles, {
             1: ["people", "stuff"],
             2: ["people", "things"]
         })
 
-        Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
+        await self.resolve(Net(ip="1.2.3.4", subnet="1.2.3.0/24").create())
 
-        self.assertEqual(Net.many().titles().titles, {
+        self.assertEqual((await self.resolve(Net.many().titles())).titles, {
             1: ["1.2.3.4"]
         })
 
-    def test_update_field(self):
+    async def test_update(self):
 
-        # Standard
+        await self.resolve(Unit([["people"], ["stuff"]]).create())
 
-        field = relations.Field(int, name="id")
-        self.source.field_init(field)
-        values = {}
-        field.value = 1
-        self.source.update_field(field, values)
-        self.assertEqual(values, {"id": 1})
+        self.assertEqual(await self.resolve(Unit.many(id=2).set(name="things").update()), 1)
 
-        # not changed
+        unit = await self.resolve(Unit.one(2).retrieve())
+        await self.resolve(unit.test.retrieve())
 
-        values = {}
-        self.source.update_field(field, values)
-        self.assertEqual(values, {})
+        unit.name = "thing"
+        unit.test.add("moar")
 
-        # auto
+        self.assertEqual(await self.resolve(unit.update()), 1)
+        self.assertEqual(unit.name, "thing")
+        self.assertEqual(unit.test[0].id, 1)
+        self.assertEqual(unit.test[0].name, "moar")
 
-        field = relations.Field(int, name="id", auto=True)
-        self.source.field_init(field)
-        values = {}
-        field.value = 1
-        self.source.update_field(field, values)
-        self.assertEqual(values, {})
+        with self.assertRaisesRegex(relations.ModelError, "plain: nothing to update from"):
+            await self.resolve(Plain.one().update())
 
-    def test_field_mass(self):
+        net = await self.resolve(Net(ip="1.2.3.4", subnet="1.2.3.0/24").create())
 
-        # Standard
+        await self.resolve((await self.resolve(Net.one(net.id).retrieve())).set(ip="5.6.7.8").update())
+        self.assertEqual((await self.resolve(Net.one(net.id).retrieve())).ip.compressed, "5.6.7.8")
 
-        field = relations.Field(int, name="id")
-        self.source.field_init(field)
-        values = {}
-        field.value = 1
-        self.source.update_field(field, values)
-        self.assertEqual(values, {"id": 1})
+        meta = await self.resolve(Meta("dive", people={"tom", "mary"}, stuff=[1, 2, 3, None], things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}).create())
 
-        # not changed
+        meta.things["a"]["b"][0] = 3
+        self.assertEqual(meta.things__a__b__0, 3)
 
-        field.changed = False
-        values = {}
-        self.source.update_field(field, values)
-        self.assertEqual(values, {})
-        self.assertFalse(field.changed)
+        await self.resolve(meta.update())
 
-        # auto
+        meta = await self.resolve(Meta.one(meta.id).retrieve())
 
-        field = relations.Field(int, name="id", auto=True)
-        self.source.field_init(field)
-        values = {}
-        field.value = 1
-        self.source.update_field(field, values)
-        self.assertEqual(values, {})
+        self.assertEqual(meta.things__a__b__0, 3)
 
-    def test_update(self):
+    async def test_delete(self):
 
-        Unit([["people"], ["stuff"]]).create()
+        unit = Unit("people")
+        unit.test.add("stuff").add("things")
+        await self.resolve(unit.create())
 
-        unit = Unit.many(id=2).set(name="things")
+        self.assertEqual(await self.resolve((await self.resolve(Test.one(id=2).retrieve())).delete()), 1)
+        self.assertEqual(await self.resolve(Test.many().count()), 1)
 
-        self.assertEqual(unit.update(), 1)
+        self.assertEqual(await self.resolve((await self.resolve(Unit.one(1).retrieve())).test.delete()), 1)
+        self.assertEqual(await self.resolve((await self.resolve(Unit.one(1).retrieve())).delete()), 1)
+        self.assertEqual(await self.resolve(Unit.many().count()), 0)
+        self.assertEqual(await self.resolve(Test.many().count()), 0)
 
-        unit = Unit.one(2)
+        self.assertEqual(await self.resolve(Unit.many(id=1).delete()), 0)
 
-        unit.name = "thing"
-        unit.test.add("moar")
+        plain = await self.resolve(Plain(0, "nope").create())
 
-        self.assertEqual(unit.update(), 1)
-        self.assertEqual(unit.name, "thing")
-        self.assertEqual(unit.test[0].id, 1)
-        self.assertEqual(unit.test[0].name, "moar")
+        with self.assertRaisesRegex(relations.ModelError, "plain: nothing to delete from"):
+            await self.resolve(plain.delete())
 
-        plain = Plain.one()
-        self.assertRaisesRegex(relations.ModelError, "plain: nothing to update from", plain.update)
 
-        net = Net(ip="1.2.3.4", subnet="1.2.3.0/24").create()
+class TestSourceScenarios(Scenarios, unittest.IsolatedAsyncioTestCase):
 
-        Net.one(net.id).set(ip="5.6.7.8").update()
-        self.assertEqual(Net.one(net.id).ip.compressed, "5.6.7.8")
+    def setUp(self):
 
-        meta = Meta("dive", people={"tom", "mary"}, stuff=[1, 2, 3, None], things={"a": {"b": [1, 2], "c": "sure"}, "4": 5, "for": [{"1": "yep"}]}).create()
+        TestSource.setUp(self)
 
-        meta.things["a"]["b"][0] = 3
-        self.assertEqual(meta.things__a__b__0, 3)
 
-        meta.update()
+class TestAsyncSource(Scenarios, unittest.IsolatedAsyncioTestCase):
 
-        meta = Meta.one(meta.id)
+    def setUp(self):
 
-        self.assertEqual(meta.things__a__b__0, 3)
+        TestSource.setUp(self)
 
-    def test_delete(self):
+        self.source = relations_rest.AsyncSource("RestSource", "http://source-api", transport=WSGITransport(self.app))
 
-        unit = Unit("people")
-        unit.test.add("stuff").add("things")
-        unit.create()
+    async def asyncTearDown(self):
 
-        self.assertEqual(Test.one(id=2).delete(), 1)
-        self.assertEqual(len(Test.many()), 1)
+        await self.source.close()
 
-        self.assertEqual(Unit.one(1).test.delete(), 1)
-        self.assertEqual(Unit.one(1).retrieve().delete(), 1)
-        self.assertEqual(len(Unit.many()), 0)
-        self.assertEqual(len(Test.many()), 0)
+    @unittest.mock.patch("relations.SOURCES", {})
+    def test___init__(self):
 
-        plain = Plain(0, "nope").create()
-        self.assertRaisesRegex(relations.ModelError, "plain: nothing to delete from", plain.delete)
+        source = relations_rest.AsyncSource("unit", "http://test.com", max_connections=5, max_keepalive=2)
+        self.assertEqual(source.name, "unit")
+        self.assertEqual(source.url, "http://test.com")
+        self.assertIsInstance(source.session, httpx.AsyncClient)
+        self.assertEqual(source.session._transport._pool._max_connections, 5)
+        self.assertEqual(source.session._transport._pool._max_keepalive_connections, 2)
+        self.assertEqual(source.session.headers["Accept-Encoding"], "gzip, deflate")
+        self.assertEqual(relations.SOURCES["unit"], source)
+
+        source = relations_rest.AsyncSource("test", "http://unit.com", session="sesh")
+        self.assertEqual(source.session, "sesh")
+        self.assertEqual(relations.SOURCES["test"], source)
+
+        source = relations_rest.AsyncSource("unit", "http://test.com", headers={"a": "b"})
+        self.assertEqual(source.session.headers["a"], "b")
+        self.assertEqual(source.session.headers["Accept-Encoding"], "gzip, deflate")
+
+        source = relations_rest.AsyncSource("unit", "http://test.com", headers={"accept-encoding": "br"})
+        self.assertEqual(source.session.headers["Accept-Encoding"], "br")
+
+        source = relations_rest.AsyncSource(
+            "unit", "http://test.com", session=httpx.AsyncClient(headers={"Accept-Encoding": "br"}),
+            compression=relations_rest.Compression(accept="gzip")
+        )
+        self.assertEqual(source.session.headers["Accept-Encoding"], "br")
+
+        source = relations_rest.AsyncSource("unit", "http://test.com", compression=relations_rest.Compression(accept="gzip"))
+        self.assertEqual(source.session.headers["Accept-Encoding"], "gzip")
+
+        self.assertRaises(TypeError, relations_rest.AsyncSource, "unit", "http://test.com", None, 5)
+
+    def test_base(self):
+
+        self.assertIsInstance(self.source, relations_rest.BaseSource)
+        self.assertNotIsInstance(self.source, relations_rest.Source)
+
+        for name in ["connect", "scope", "batch", "flush", "executor", "gather", "request", "get", "fetch", "send", "prefetch"]:
+            self.assertFalse(hasattr(self.source, name), name)